@@ -1,5 +1,55 @@
 import pygame
 import logging
+import weakref
+from collections import OrderedDict
+
+from game_data.settings import *
+from game_clock import game_clock
+from game_functions import optimize_surface
+
+
+# Mirrored copies of images, made the first time something faces left - flipping a frame every time it's shown
+# would also throw away the RLE encoding of colorkey frames (see optimize_surface()), and redo it on every blit
+flipped_images = weakref.WeakKeyDictionary()
+
+def flip_image(image: pygame.Surface, flip: bool) -> pygame.Surface:
+    """ image mirrored left to right when flip is True, the same image otherwise """
+    if not flip:
+        return image
+    flipped = flipped_images.get(image)
+    if flipped is None:
+        flipped = pygame.transform.flip(image, True, False)
+        if flipped.get_colorkey():  # flip() keeps the colorkey but not RLEACCEL
+            flipped.set_colorkey(flipped.get_colorkey(), pygame.RLEACCEL)
+        flipped_images[image] = flipped
+    return flipped
+
+# Tinted copies of images (hit flashes, stunned monsters), made the first time they're shown
+tinted_images = OrderedDict()  # (image, tint): tinted image, least recently used first
+
+def tinted_image(image: pygame.Surface, tint: str) -> pygame.Surface:
+    """ image tinted with one of the TINTS - only the first time costs anything, we keep the last TINT_CACHE_SIZE """
+    key = (image, tint)
+    tinted = tinted_images.get(key)
+    if tinted is None:
+        tinted = image.convert_alpha()  # with per-pixel alpha, so the transparent parts (or colorkey) don't get tinted
+        tinted.fill(TINTS[tint], special_flags=pygame.BLEND_RGB_MULT)
+        tinted = optimize_surface(tinted)
+        tinted_images[key] = tinted
+        if len(tinted_images) > TINT_CACHE_SIZE:
+            tinted_images.popitem(last=False)
+    else:
+        tinted_images.move_to_end(key)
+    return tinted
+
+def trim_image(image: pygame.Surface) -> tuple:
+    """ image cut down to the box around its visible pixels, and where that box is in the image """
+    bounds = image.get_bounding_rect()
+    trimmed = image.subsurface(bounds).copy()
+    if trimmed.get_colorkey():
+        trimmed.set_colorkey(trimmed.get_colorkey(), pygame.RLEACCEL)
+    return trimmed, bounds.topleft
+
 
 # --- Imports sprite sheets for animatons
 # SpriteSheet class
@@ -18,10 +68,25 @@ class SpriteSheet():
         image = pygame.Surface((self.x_dim, self.y_dim), pygame.SRCALPHA).convert_alpha()  # empty surface with alpha
         image.blit(self.image, (0,0), (x_start, y_start, self.x_dim, self.y_dim))  # Copy part of sheet on top of empty image
         image = pygame.transform.scale(image, (self.x_dim * self.scale, self.y_dim * self.scale))
-        #image.set_colorkey(self.transp_color)
         
-        return image
+        return optimize_surface(image)  # opaque, colorkey or alpha, whatever is cheapest to draw
+
+
 
+# Frame sequence class
+class FrameSequence():
+    """ The frames of an animation, cut from the sprite sheet once and shared by every Animation playing them
+        Never changed after it's made - all playback state (current frame, timers) lives in the Animation
+    """
+    def __init__(self, sprite_sheet: SpriteSheet, row:int=0, frames:int=1, speed:int=100, repeat:bool=True) -> None:
+        self.ss = sprite_sheet
+        self.row = row
+        self.frames = frames
+        self.speed = speed   # Effecticely the ms we wait for next animation frame - bigger means slower
+        self.repeat = repeat  # should we run forever or just once
+        self.sprites = tuple(sprite_sheet.get_image(row, frame) for frame in range(frames))
+        self.trims = tuple(trim_image(sprite) for sprite in self.sprites)  # (trimmed frame, offset) - what gets drawn, see Animation.get_trimmed()
+        self.masks = {}  # (frame number, flipped): collision mask, made the first time it's needed (see Animation.get_mask())
 
 
 # Animation class
@@ -29,29 +94,51 @@ class Animation():
     """ Class which reads the sprite sheet and animates the images in sprites 
         Reads single rwo from the sprite sheet and builds list of images which
         is iterated through (and looped over if repeat == True)
+
+        The frames are a FrameSequence, shared with every copy() of the animation - a copy only
+        has its own place in the animation, so many monsters (or leaves) can each play their own
+        without cutting up the sprite sheet again.
     """
 
     # Getting a sprite sheet
-    def __init__(self, sprite_sheet: pygame.Surface, row:int=0, frames:int=1, speed:int=100, repeat:bool=True) -> None:
-        self.ss = sprite_sheet
-        self.row = row
-        self.frames = frames
-        self.sprites = []
-        self.speed = speed   # Effecticely the ms we wait for next animation frame - bigger means slower
+    def __init__(self, sprite_sheet: SpriteSheet=None, row:int=0, frames:int=1, speed:int=100, repeat:bool=True, sequence: FrameSequence=None) -> None:
+        self.sequence = sequence or FrameSequence(sprite_sheet, row, frames, speed, repeat)
         self.active = False  # We begin in the stopped state
-        self.repeat = repeat  # should we run forever or just once
-
-        [self.sprites.append(self.ss.get_image(row, frame)) for frame in range(frames)]
         
         self.frame_number = 0 
         self.on_last_frame = False  # gives way to check if animation is done (and ready to start over)
         self.last_run = 0
         self.repeat_start = 0  # ticks of time when we're done with one animation frame cycle
         self.first_done = False  # True when done one cycle of frames
+
+    def copy(self) -> 'Animation':
+        """ A new animation playing the same frames, from the start """
+        return Animation(sequence=self.sequence)
+
+    # The frames and how to play them are in the shared sequence
+    @property
+    def ss(self) -> SpriteSheet:
+        return self.sequence.ss
+
+    @property
+    def frames(self) -> int:
+        return self.sequence.frames
+
+    @property
+    def sprites(self) -> tuple:
+        return self.sequence.sprites
+
+    @property
+    def speed(self) -> int:
+        return self.sequence.speed
+
+    @property
+    def repeat(self) -> bool:
+        return self.sequence.repeat
         
     def get_image(self, repeat_delay=0) -> pygame.Surface:
         # Returns the next image in the animation when active
-        now = pygame.time.get_ticks()
+        now = game_clock.get_ticks()
         time_since_last = now - self.last_run  # ticks since last run
 
         if now > self.repeat_start + repeat_delay and self.active and time_since_last > self.speed:  # time for a new frame
@@ -73,11 +160,41 @@ class Animation():
                     
                 self.last_run = now
         try:
-            image = self.sprites[self.frame_number].convert_alpha()
+            image = self.sprites[self.frame_number]
         except IndexError:
             logging.error(f'INDEX ERROR: unable to get frame (frame_number) {self.frame_number} from sprite sheet {self.ss}')
             exit(1)
         return image
 
+    def get_trimmed(self, flipped: bool=False) -> tuple:
+        """ The current frame without its transparent border, and where to draw it: (image, (x, y) from the frame's top left)
+            Big sprites are mostly empty space, so drawing this instead of get_image() blits a lot fewer pixels
+        """
+        image, (x, y) = self.sequence.trims[self.frame_number]
+        if flipped:  # the border on the right becomes the border on the left
+            x = self.sequence.sprites[self.frame_number].get_width() - x - image.get_width()
+        return flip_image(image, flipped), (x, y)
+
+    def get_mask(self, flipped: bool=False) -> pygame.mask.Mask:
+        """ Collision mask of the current frame, facing right or flipped to face left
+            Masks are only made once per frame and facing, and shared by all copies of the animation
+        """
+        masks = self.sequence.masks
+        key = (self.frame_number, flipped)
+        mask = masks.get(key)
+        if mask is None:
+            mask = pygame.mask.from_surface(flip_image(self.sequence.sprites[self.frame_number], flipped))
+            masks[key] = mask
+        return mask
+
     def start_over(self) -> None:
-        self.frame_number = 0 
\ No newline at end of file
+        self.frame_number = 0 
+
+    def reset(self) -> None:
+        """ Back to the state the animation was created in """
+        self.frame_number = 0
+        self.active = False
+        self.on_last_frame = False
+        self.last_run = 0
+        self.repeat_start = 0
+        self.first_done = False
\ No newline at end of file
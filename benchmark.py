@@ -0,0 +1,171 @@
+"""
+Scenario benchmarks - runs fixed, seeded scenarios headlessly and reports frame times per stage of Level.run()
+
+Scenarios (run in this order, so the cold level load really is the first one in the process):
+    level-load      : creating level 1, cold (first time, in a fresh process) and warm (again, 10 times)
+    level-1-run     : a scripted run through level 1
+    arena-50        : the arena with 50 skeleton warriors, spawned through the monster spawn queue
+    storm-particles : level 1's lightning storm, with 500 blood particles kept alive on screen
+
+Usage: python benchmark.py                          (all scenarios, JSON to stdout)
+       python benchmark.py --scenario arena-50 --output before.json
+
+For every scenario we report percentiles (p50/p90/p95/p99, mean, max, all in ms) of the whole frame and of each
+stage: background, terrain, monsters, player, effects, render, collision (in Level.run()) and hud (in Game.run()).
+The parts inside each stage (every sprite group's update and draw, every collision check) are under 'stage/part'.
+Run the same benchmark on two commits and compare the JSON files.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import subprocess
+
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'  # pygame's banner goes to stdout, where the JSON report goes
+import pygame as pg
+
+from game_data.settings import *
+from headless import HeadlessGame, InputScript
+from profiler import percentiles
+
+
+BENCHMARK_SEED = 1234
+WARM_LOADS = 10
+STORM_PARTICLES = 500
+ARENA_MONSTERS = 50
+SKELETON_WARRIOR = 4  # monster number in the arena spawn queue (same as pressing 4)
+
+
+def level_run_script() -> InputScript:
+    """ Runs right, jumping and attacking at regular intervals """
+    script = InputScript([(0, 'right', True)])
+    for frame in range(40, FPS * 60, 90):
+        script.add(frame, 'up', True)
+        script.add(frame + 2, 'up', False)
+    for frame in range(70, FPS * 60, 150):
+        script.add(frame, 'attack', True)
+        script.add(frame + 5, 'attack', False)
+    return script
+
+
+def profile_frames(headless: HeadlessGame, frames: int, before_frame=None) -> dict:
+    """ Runs up to frames frames with the profiler on, and sums up the frame and stage timings """
+    profiler = headless.gs.profiler
+    profiler.enable('benchmark')
+    profiler.keep_history = True
+    profiler.history = []
+
+    for _ in range(frames):
+        if before_frame:
+            before_frame(headless)
+        if not headless.step():
+            break
+
+    profiler.disable('benchmark')
+    stages = {}
+    for frame in profiler.history:
+        for stage, ms in frame.items():
+            stages.setdefault(stage, []).append(ms)
+
+    return {
+        'frames': len(profiler.history),
+        'frame_ms': percentiles(stages.pop('frame', [])),
+        'stages': {stage: percentiles(values) for stage, values in sorted(stages.items())},
+    }
+
+
+# --- Scenarios ---
+def bench_level_load(frames: int, seed: int) -> dict:
+    start = time.perf_counter()
+    headless = HeadlessGame(1, seed=seed)  # the first one in the process also loads all images at import
+    cold = (time.perf_counter() - start) * 1000
+
+    warm = []
+    for _ in range(WARM_LOADS):
+        start = time.perf_counter()
+        headless.game.create_level(1, seed=seed)
+        warm.append((time.perf_counter() - start) * 1000)
+
+    return {'cold_ms': cold, 'warm_ms': percentiles(warm), 'warm_loads': WARM_LOADS}
+
+
+def bench_level_run(frames: int, seed: int) -> dict:
+    headless = HeadlessGame(1, level_run_script(), seed=seed)
+    return profile_frames(headless, frames)
+
+
+def bench_arena(frames: int, seed: int) -> dict:
+    headless = HeadlessGame(0, seed=seed)
+    headless.gs.monster_spawn_queue.extend([SKELETON_WARRIOR] * ARENA_MONSTERS)
+    result = profile_frames(headless, frames)
+    result['monsters'] = len(headless.level.monsters_sprites)
+    return result
+
+
+def bench_storm_particles(frames: int, seed: int) -> dict:
+    def add_blood(headless: HeadlessGame) -> None:
+        level = headless.level
+        hitbox = level.player.rects['hitbox']
+        while len(level.particle_system.all_particles) < STORM_PARTICLES:
+            level.particles_blood(hitbox.centerx, hitbox.centery - 100, RED, False)
+
+    headless = HeadlessGame(1, seed=seed)  # level 1 has the lightning storm
+    return profile_frames(headless, frames, add_blood)
+
+
+SCENARIOS = {
+    'level-load': bench_level_load,
+    'level-1-run': bench_level_run,
+    'arena-50': bench_arena,
+    'storm-particles': bench_storm_particles,
+}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(names: list, frames: int, seed: int) -> dict:
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'pygame': pg.version.ver,
+        'frames': frames,
+        'seed': seed,
+        'scenarios': {},
+    }
+    for name in names:
+        logging.info(f'Running {name}')
+        start = time.perf_counter()
+        report['scenarios'][name] = SCENARIOS[name](frames, seed)
+        logging.info(f'{name} done in {time.perf_counter() - start:.1f}s')
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the Phflorg scenario benchmarks')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS.keys(), help='scenario to run (repeat for more), default is all')
+    parser.add_argument('--frames', type=int, default=FPS * 20, help='frames per scenario')
+    parser.add_argument('--seed', type=int, default=BENCHMARK_SEED, help='random seed')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    report = run_benchmarks(args.scenario or list(SCENARIOS), args.frames, args.seed)
+
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+        logging.info(f'Report written to {args.output}')
+    else:
+        print(json.dumps(report, indent=2))
+    pg.quit()
+    sys.exit(0)
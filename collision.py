@@ -0,0 +1,137 @@
+"""
+BroadPhase (class)          : sweep-and-prune over the moving things in a level, giving typed contact pairs for the collision checks
+TriggerZones (class)        : things the player walks into (pickups, doors, portals, the exit, drops), as enter/stay/exit events
+mask_hits_rect (function)   : pixel accurate second stage of a hit test, after the rects overlap
+"""
+
+import pygame as pg
+
+from game_data.settings import *
+from spatial import SpatialGrid
+
+
+# The contacts we care about, as (kind, kind) - a contact list holds (item of first kind, item of second kind)
+CONTACT_TYPES = (
+    ('player', 'monster'),  # player hitbox against monster hitboxes
+    ('player', 'projectile'),
+    ('player', 'spell'),
+    ('attack', 'monster'),  # the player's attack rect
+    ('attack', 'projectile'),
+    ('stomp', 'monster'),  # the stomp blast
+)
+
+
+class BroadPhase:
+    """ Sweep-and-prune: sorts everything by the left edge of its rect, and sweeps left to right, only comparing
+        things that overlap horizontally. That finds all overlapping pairs in one pass, instead of every check
+        calling spritecollide() (often twice) against a whole group.
+
+        Each frame: clear(), add() every moving thing with its kind and rect, then find_contacts().
+        The contacts are candidates from the start of the checks - a check that changes a rect or kills
+        a sprite has to be allowed for by the checks that come after it.
+    """
+    def __init__(self, contact_types: tuple=CONTACT_TYPES) -> None:
+        self.contact_types = contact_types
+        self.entries = []  # (rect.left, index, kind, item, rect)
+
+    def clear(self) -> None:
+        self.entries = []
+
+    def add(self, kind: str, item, rect: pg.Rect) -> None:
+        if rect and rect.width and rect.height:  # empty rects never collide (dead monsters, no attack)
+            self.entries.append((rect.left, len(self.entries), kind, item, rect))
+
+    def find_contacts(self) -> dict:
+        """ Returns {(kind, kind): [(item, item), ...]} for every contact type, in the order things were added """
+        found = {contact_type: [] for contact_type in self.contact_types}  # (index, index, item, item) while sweeping
+
+        self.entries.sort(key=lambda entry: entry[:2])
+        active = []
+        for entry in self.entries:
+            left, index, kind, item, rect = entry
+            active = [other for other in active if other[4].right > left]  # drop what ended before this one starts
+            for _, other_index, other_kind, other_item, other_rect in active:
+                if other_rect.top < rect.bottom and rect.top < other_rect.bottom:  # x already overlaps, so check y
+                    if (other_kind, kind) in found:
+                        found[(other_kind, kind)].append((other_index, index, other_item, item))
+                    elif (kind, other_kind) in found:
+                        found[(kind, other_kind)].append((index, other_index, item, other_item))
+            active.append(entry)
+
+        contacts = {}
+        for contact_type, pairs in found.items():
+            pairs.sort(key=lambda pair: pair[:2])
+            contacts[contact_type] = [(first, second) for _, _, first, second in pairs]
+        return contacts
+
+
+# Trigger zone events
+TRIGGER_ENTER = 'enter'  # the player just walked into the zone
+TRIGGER_STAY = 'stay'  # still in it
+TRIGGER_EXIT = 'exit'  # just left it
+
+
+class TriggerZones:
+    """ Zones that do something when the player walks into them - pickups, doors, portals, the level exit and drops
+
+        Zones are sprites that only move with the scroll, so we keep them in a spatial grid in world coordinates and
+        keep track of the scroll (like MonsterScheduler). update() only tests the zones near the player, and returns
+        events for the zones the player entered, stayed in or left, instead of every check testing its whole group.
+    """
+    def __init__(self, cell_size: int=TRIGGER_GRID_CELL) -> None:
+        self.grid = SpatialGrid(cell_size)
+        self.zones = {}  # sprite: (kind, use_body, number in order of adding)
+        self.inside = {}  # sprite: kind, the zones the player is in
+        self.scroll_x = 0  # total scroll so far: screen position = world position + scroll
+        self.scroll_y = 0
+        self.added = 0
+
+    def add(self, kind: str, sprite: pg.sprite.Sprite, use_body: bool=False) -> None:
+        """ Zones are tested against the player's hitbox, or the whole player rect with use_body """
+        if sprite in self.zones:  # a reused sprite (see SpritePool), start over
+            self.remove(sprite)
+        self.zones[sprite] = (kind, use_body, self.added)
+        self.added += 1
+        self.grid.insert(sprite, sprite.rect.move(-self.scroll_x, -self.scroll_y))
+
+    def remove(self, sprite: pg.sprite.Sprite) -> None:
+        """ Removes a zone without an exit event, for things that are used up (pickups, drops) """
+        self.grid.remove(sprite)
+        self.zones.pop(sprite, None)
+        self.inside.pop(sprite, None)
+
+    def scroll(self, h_scroll, v_scroll) -> None:
+        """ Called along with the sprite group updates, so we scroll exactly like the zone sprites do """
+        self.scroll_x += h_scroll
+        self.scroll_y += v_scroll
+
+    def update(self, hitbox: pg.Rect, body: pg.Rect) -> list:
+        """ Returns [(event, kind, sprite), ...] - exits first, then enters and stays in the order the zones were added """
+        area = hitbox.union(body).move(-self.scroll_x, -self.scroll_y)
+        touching = {}
+        for sprite in sorted(self.grid.query(area), key=lambda sprite: self.zones[sprite][2]):
+            if not sprite.alive():  # killed elsewhere
+                self.remove(sprite)
+                continue
+            kind, use_body, _ = self.zones[sprite]
+            if sprite.rect.colliderect(body if use_body else hitbox):
+                touching[sprite] = kind
+
+        events = [(TRIGGER_EXIT, kind, sprite) for sprite, kind in self.inside.items() if sprite not in touching]
+        events += [(TRIGGER_STAY if sprite in self.inside else TRIGGER_ENTER, kind, sprite) for sprite, kind in touching.items()]
+        self.inside = touching
+        return events
+
+
+# Filled masks the size of a rect, so masks can be tested against rects (hitboxes) - one per size, made when first needed
+rect_masks = {}
+
+def mask_hits_rect(mask: pg.mask.Mask, topleft: tuple, rect: pg.Rect) -> bool:
+    """ True if any set pixel of mask, drawn at topleft, is inside rect
+        Only call this when the rects already overlap - the masks are the expensive second stage of the test
+    """
+    rect_mask = rect_masks.get(rect.size)
+    if rect_mask is None:
+        rect_mask = pg.Mask(rect.size, fill=True)
+        rect_masks[rect.size] = rect_mask
+    return mask.overlap(rect_mask, (rect.x - topleft[0], rect.y - topleft[1])) is not None
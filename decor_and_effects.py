@@ -1,10 +1,14 @@
 import pygame as pg
-from random import random, randint
+import random
 
 from game_data.level_data import *
 from game_data.settings import *
-from game_tiles import GameTileAnimation
 from game_functions import *
+from game_clock import game_clock
+from game_random import game_random
+
+rng_env = game_random.stream('environment')  # leaves, wind, weather and the sky
+rng_fx = game_random.stream('effects')  # player effects
 
 
 # --- Show floating info bubbles ---
@@ -32,7 +36,7 @@ class BubbleMessage:
         self.min_delay = 1000*10  # 10 seconds
         self.last_time = -self.min_delay  # just to make sure we run the first time without delay
         self.start_time = 0
-        self.init_time = pg.time.get_ticks()
+        self.init_time = game_clock.get_ticks()
         self.duration = ttl
         self.font_size = 64
         
@@ -73,13 +77,13 @@ class BubbleMessage:
 
     def show(self) -> None:
         # we compensate for scrolling
-        now = pg.time.get_ticks()
+        now = game_clock.get_ticks()
         if now - self.init_time > self.start_delay:
             # First we show the message and freeze for a brief moment
             if now > self.last_time + self.min_delay and not self.active:
                 self._display_msg()
                 self.active = True
-                pg.time.wait(50)
+                game_clock.wait(50)
                 self.last_time = now
                 self.start_time = now
 
@@ -99,79 +103,120 @@ class BubbleMessage:
 
 
 # --- Various environmental effects
-class EnvironmentalEffects(pg.sprite.Group):
+class EnvironmentalEffects:
     """
     Class for adding non-interactive environmental effects, like blowing leaves, snow, raid etc.
+    Leaves and snowflakes are not sprites: each is a position in flat lists (self.x, self.y), and update() moves them all
+    in one go with the drift table (wind speed at each height). The images are queued for drawing with the rest of the level.
     """
-    def __init__(self, effect, screen) -> pg.sprite.Group:
-        super().__init__()
+    def __init__(self, effect, screen) -> None:
         from game_data.animation_data import leaves_ss
         from animation import Animation
-        self.Anim = Animation
-        self.ss = leaves_ss
         self.effect = effect  # 'leaves', 'snow', all found in level_data for each level
         self.screen = screen
         self.base_wind = -1  # blowing toward the left of the screen
         self.gust_strength = 1
         self.wind = Wind(self.base_wind)  
-        self.fall_from_top = 0
-        self.last_leaf = 0
-        self.last_update = 0 
-        if self.effect == 'leaves':
-            self.inertia = 0.5  # % of wind speed to remove
-        
         self.last_run = 0
         self.last_gust_change = 0
         self.frequency = 10  # times per second we update the environmental effects
 
-    def _add_leaf(self) -> None:
-        now = pg.time.get_ticks() 
-        if random.random() < 1/30: # making sure we've waited long enough
-            leaf = GameTileAnimation(16,16,randint(SCREEN_WIDTH, SCREEN_WIDTH*3), randint(0, SCREEN_HEIGHT/4), self.Anim(self.ss, frames=10, speed=100, repeat=True))  # TODO: They ALL use the SAME Animation instance, so all animate identically
-            leaf.x_vel = random.uniform(-4, -1)  # starting horisontal speed
-            leaf.y_vel = GRAVITY * 2
-            leaf.animation.active = True
-            leaf.animation.frame_number = randint(0,leaf.animation.frames -1 )
-            self.add(leaf)
-            
-            self.last_leaf = now
-            
-    
+        self.x = []  # top left of every leaf or flake, in screen coordinates
+        self.y = []
+        self.phase = []  # animation frame each leaf started on
+        self.images = ()  # animation frames, played at frame_time ms a frame
+        self.frame_time = 1
+        self.inertia = 0  # % of wind speed to remove
+        self.fall_speed = 0
+        self.spawn_chance = 0  # chance of a new leaf or flake every update
+        self.spawn_rate = 1  # part of spawn_chance we use, turned down when frames take too long (see QualityGovernor)
+        self.max_particles = 0
+
+        if self.effect == 'leaves':
+            leaf_anim = Animation(leaves_ss, frames=10, speed=100, repeat=True)
+            self.images = leaf_anim.sprites  # every leaf plays the same frames, from its own starting frame
+            self.frame_time = leaf_anim.speed
+            self.inertia = 0.5
+            self.fall_speed = GRAVITY * 2
+            self.spawn_chance = 1/30
+            self.max_particles = 100
+        elif self.effect == 'snow':
+            flake = pg.Surface((6, 6)).convert()
+            flake.fill(WHITE)
+            self.images = (flake,)
+            self.inertia = 0.25  # snow floats more in the wind than leaves
+            self.fall_speed = GRAVITY
+            self.spawn_chance = 1/5
+            self.max_particles = 300
+
+        self.size = self.images[0].get_height() if self.images else 0
+        self.drift = self._drift_table()
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def _drift_table(self) -> list:
+        """ How far a leaf or flake moves sideways per update, at each height from 0 (top of the screen) to 100 (bottom)
+            Each one is assumed to float in the wind, minus the inertia for each category (snow less than leaves etc.)
+            Only changes with the wind gusts, so we make it then, instead of working it out for every leaf on every update
+        """
+        drift = []
+        for wind in self.wind.update(self.gust_strength):
+            x_vel = self.base_wind - wind  # we add the wind component for this height (vertical sine wave)
+
+            # Compensating for inertia which alsways tries to slow things down
+            if x_vel < self.base_wind:  # always the case at first
+                x_vel -= x_vel * self.inertia
+            if x_vel > self.base_wind:
+                x_vel += x_vel * self.inertia
+            drift.append(int(x_vel))
+        return drift
+
+    def _add_particle(self) -> None:
+        if rng_env.random() < self.spawn_chance * self.spawn_rate:
+            if self.effect == 'leaves':  # leaves blow in from the right
+                self.x.append(rng_env.randint(SCREEN_WIDTH, SCREEN_WIDTH*3))
+                self.y.append(rng_env.randint(0, SCREEN_HEIGHT//4))
+            else:  # snow falls from above the screen
+                self.x.append(rng_env.randint(0, SCREEN_WIDTH*2))
+                self.y.append(-self.size)
+            self.phase.append(rng_env.randint(0, len(self.images) - 1))
 
     def update(self, h_scroll, v_scroll) -> None:
-        # Here we set the x_vel for each sprite to match the wind at their respective vertical position
-        # Each particle is assumed to float in the wind, minus the enertia for each category (snow less than leaves etc.)
-        now = pg.time.get_ticks()
+        now = game_clock.get_ticks()
         if now - self.last_run >  1000 / self.frequency:
             if now - self.last_gust_change > 1000 * 10:
-                self.gust_strength = randint(1,3)  # every 10 seconds we change the wind gust speed 
+                self.gust_strength = rng_env.randint(1,3)  # every 10 seconds we change the wind gust speed 
                 self.last_gust_change = now
-
-            # The wind provides a list of wind speed 
-            wind_field = self.wind.update(self.gust_strength)
-
-            for sprite in self.sprites():
-                # Compensate for wind
-                list_pos = int((sprite.rect.centery / SCREEN_HEIGHT) * 100)  # position in list depending on y position of sprite
-                sprite.x_vel = self.base_wind - wind_field[list_pos]  # we add the wind component for our current height (vertical sine wave)
-
-
-                # Compensating for inertia which alsways tries to slow the sprite down
-                if sprite.x_vel < self.base_wind:  # always the case at first
-                    sprite.x_vel -= sprite.x_vel * self.inertia
-                if sprite.x_vel > self.base_wind:
-                    sprite.x_vel += sprite.x_vel * self.inertia
-
-                sprite.update(h_scroll, v_scroll)
-                
-                # Removing sprites that have gone off screen
-                if sprite.rect.centery > SCREEN_HEIGHT:
-                    sprite.kill()
-                sprite.image = sprite.animation.get_image()
-            
-            # Here we add the leaves
-            if len(self.sprites()) < 100 and self.effect == 'leaves':
-                self._add_leaf()
+                self.drift = self._drift_table()
+
+            if self.x:
+                # The sideways drift depends on the height of the center, before moving
+                drift, half = self.drift, self.size // 2
+                self.x = [x + h_scroll + drift[min(max(int((y + half) / SCREEN_HEIGHT * 100), 0), 100)] for x, y in zip(self.x, self.y)]
+                self.y = [y + v_scroll + self.fall_speed for y in self.y]
+
+                # Removing the ones that have gone off screen
+                if any(y + half > SCREEN_HEIGHT for y in self.y):
+                    kept = [i for i, y in enumerate(self.y) if y + half <= SCREEN_HEIGHT]
+                    self.x = [self.x[i] for i in kept]
+                    self.y = [self.y[i] for i in kept]
+                    self.phase = [self.phase[i] for i in kept]
+
+            # Here we add the leaves and snow
+            if len(self.x) < self.max_particles:
+                self._add_particle()
+
+    def draw(self, render_queue) -> int:
+        """ Queues the leaves and flakes on screen for drawing (see RenderQueue), returns how many """
+        if not self.x:
+            return 0
+        images, size = self.images, self.size
+        frame = game_clock.get_ticks() // self.frame_time
+        blits = [(images[(phase + frame) % len(images)], (x, y)) for x, y, phase in zip(self.x, self.y, self.phase)
+                 if -size < x < SCREEN_WIDTH and -size < y < SCREEN_HEIGHT]
+        render_queue.extend(blits)
+        return len(blits)
 
 
 # --- Expanding circle effects for spells
@@ -193,7 +238,7 @@ class ExpandingCircle:
         # It's fire-and-forget
         self.x += h_scroll
         self.y += v_scroll
-        now = pg.time.get_ticks()
+        now = game_clock.get_ticks()
 
         if now - self.last_update > self.frame_delay:
             self.radius += 3
@@ -264,22 +309,19 @@ class GamePanel:
         img2 = img
         img2.fill((100, 100, 100, 0), special_flags=pg.BLEND_RGBA_ADD)
         
-        surf = pg.Surface(pg.display.get_window_size())
-        surf.set_alpha(opacity)  
-        surf.fill((0,0,0)) # fill the entire surface
-        self.screen.blit(surf, (0,0))  # blit to screen
+        self.screen.blit(color_overlay(BLACK, pg.display.get_window_size(), opacity), (0,0))  # darken the entire screen
         pg.display.update()
         screen_cpy = self.screen.copy()
-        pg.time.wait(250)     
+        self.gs.clock.wait(250)     
 
         for _ in range(10):
             self.screen.blit(img2, (x,y))
             pg.display.update()
-            pg.time.wait(75)
+            self.gs.clock.wait(75)
 
             self.screen.blit(screen_cpy, (0,0))  # starting over
             pg.display.update()
-            pg.time.wait(75)
+            self.gs.clock.wait(75)
         
     def draw(self) -> None:
 
@@ -397,7 +439,7 @@ class InfoPopup(pg.sprite.Sprite):
         if self.state == 'roll-in':
             direction = -1
         
-        now = pg.time.get_ticks()
+        now = game_clock.get_ticks()
         if now - self.ticks_since_last > 10:
             if self.state in ('roll-in', 'roll-out'):
                 self.image.fill((0, 0, 0, 0)) # Set the surface to be completely transparent
@@ -411,10 +453,20 @@ class InfoPopup(pg.sprite.Sprite):
         
 
 # --- Stomp splash effect
+# Pre-rendered stomp effects (see LightEffect1) - made the first time the player stomps, and kept for the rest of the game
+light_effect_variants = []
+
 class LightEffect1(pg.sprite.Sprite):
     """
     Class which gives light effect consisting of vertical lines shooting up from the ground
+    The lines are drawn once, into STOMP_EFFECT_VARIANTS images, and each stomp picks one of those at random
     """
+    line_numbers = 50
+    line_width = 4
+    line_max_height = 200
+    line_seg_height = 4
+    max_segments = line_max_height // line_seg_height
+
     def __init__(self, x, y) -> None:
         super().__init__()
         self.x = x
@@ -426,44 +478,40 @@ class LightEffect1(pg.sprite.Sprite):
         self.step_delay = 10
 
         self.done = False
-        
-        self.line_numbers = 50
-        self.line_width = 4
-        self.line_max_height = 200
-        self.line_seg_height = 4
-        self.max_segments = self.line_max_height // self.line_seg_height
-
-        self.image = pg.Surface((self.line_width * self.line_numbers, self.line_max_height)).convert_alpha()
-        self.working_image = self.image.copy()
+
+        if not light_effect_variants:
+            light_effect_variants.extend(self.draw_lines(random.Random(variant)) for variant in range(STOMP_EFFECT_VARIANTS))
+        self.working_image = light_effect_variants[rng_fx.randrange(STOMP_EFFECT_VARIANTS)]
+
+        self.image = pg.Surface(self.working_image.get_size()).convert()
+        self.image.set_colorkey(BLACK)
+        self.image.set_alpha(128)
         self.rect = self.image.get_rect()
-        self.firelines = []  # list or columns, with list of segments for each column
 
         self.start_x = self.x - (self.line_numbers / 2 ) * self.line_width
 
+    @classmethod
+    def draw_lines(cls, rng: random.Random) -> pg.Surface:
+        """ One variant of the effect: all the lines at full height, which update() slides up into view and back down """
+        working_image = pg.Surface((cls.line_width * cls.line_numbers, cls.line_max_height)).convert()
 
-        for column in range(self.line_numbers):
+        for column in range(cls.line_numbers):
             # each line varies in length from 1/3 to the full max_height
-            # we pre-calculte as much as possible to not put work in the loop
-            self.line_height = randint(self.line_max_height//3, self.line_max_height)
-            self.line_x = self.start_x + column * self.line_width
-            color_segments  = int((self.line_height / self.line_seg_height) // 4) # how may segments in each color
-            padding = self.max_segments - color_segments * 4 + 4  # the last 4 is just to wipe any remaining non-black pixels when moving down
-
-            # We add the segments in reverse order, so we start with the top
-            segment_list = [pg.Color('#000000')] * padding + [pg.Color('#df7126')] * color_segments + [pg.Color('#fbf236') ] * color_segments \
-                            + [pg.Color('#fffa8c')] * color_segments + [pg.Color('#ffffff')] * color_segments 
-            
-            self.firelines.append(segment_list)
-
-        # We create a working surface were we plot the final result and the h_scroll that upwards onto self.image
-        for step in range (self.steps_total):
-                for count, line in enumerate(self.firelines):     
-                    image_x =  count * self.line_width
-                    image_y = step * self.line_seg_height 
-                    pg.draw.rect(self.working_image, line[step], (image_x, image_y, self.line_width, self.line_seg_height))
+            line_height = rng.randint(cls.line_max_height//3, cls.line_max_height)
+            color_segments  = int((line_height / cls.line_seg_height) // 4) # how may segments in each color
+            padding = cls.max_segments - color_segments * 4 + 4  # the last 4 is just to wipe any remaining non-black pixels when moving down
+
+            # We add the segments in reverse order, so we start with the top - as one rect per color, the black is already there
+            segment = padding
+            for color in ('#df7126', '#fbf236', '#fffa8c', '#ffffff'):
+                rect = pg.Rect(column * cls.line_width, segment * cls.line_seg_height, cls.line_width, color_segments * cls.line_seg_height)
+                pg.draw.rect(working_image, color, rect)
+                segment += color_segments
+
+        return working_image
         
     def update(self, h_scroll, v_scroll) -> None:
-        now = pg.time.get_ticks()
+        now = game_clock.get_ticks()
         self.start_x += h_scroll
                         
         if now - self.last_run > self.step_delay:
@@ -478,55 +526,72 @@ class LightEffect1(pg.sprite.Sprite):
                 self.done = True
             self.last_run = now  
 
-            self.image.set_colorkey(BLACK)
-            self.image.set_alpha(128)
             # We use the super draw method, so rect needs to be updated
             self.rect.centerx = self.x
             self.rect.centery = self.y - 50
 
 
 # --- Various particles
+class Particle:
+    """ One particle - there can be hundreds, so only the fields we need, in __slots__ """
+    __slots__ = ('x', 'y', 'x_vel', 'y_vel', 'radius', 'color')
+
+    def __init__(self, x, y, x_vel, y_vel, radius, color) -> None:
+        self.reset(x, y, x_vel, y_vel, radius, color)
+
+    def reset(self, x, y, x_vel, y_vel, radius, color) -> None:
+        self.x, self.y = x, y  # center
+        self.x_vel, self.y_vel = x_vel, y_vel
+        self.radius = radius
+        self.color = color
+
+
 class ParticleSystem:
     def __init__(self) -> None:
         """ Particle system with pixel art extension """
         self.all_particles = []
-        self.particle = {
-                'center': list,
-                'velocity': list,
-                'radius': float,
-                'color':pg.Color,
-            }
+        self.free_particles = []  # dead particles, reused by spawn() so we don't make 50 new ones for every hit
         self.last_run = 0
         self.update_delay = 15
         
-    def add(self, particle) -> None:
+    def spawn(self, x, y, x_vel, y_vel, radius, color) -> None:
+        """ Adds a particle, reusing a dead one when we have one """
+        if self.free_particles:
+            particle = self.free_particles.pop()
+            particle.reset(x, y, x_vel, y_vel, radius, color)
+        else:
+            particle = Particle(x, y, x_vel, y_vel, radius, color)
         self.all_particles.append(particle)
         
     def update(self, h_scroll, v_scroll) -> None:
-        now = pg.time.get_ticks()
+        now = game_clock.get_ticks()
         if now - self.last_run > self.update_delay:
+            alive = []  # built as we go, removing from the list we're going through would skip the next particle
             for particle in self.all_particles:
                 # Updating velocities
-                particle['velocity'][1] += GRAVITY * 2  # adding gravity to the velocity (looks better if we add some more gravity/)
+                particle.y_vel += GRAVITY * 2  # adding gravity to the velocity (looks better if we add some more gravity/)
 
                 # Updating coordinates as funtion of velocities
-                particle['center'][0] += h_scroll + particle['velocity'][0] # x
-                particle['center'][1] += v_scroll + particle['velocity'][1]  # y
+                particle.x += h_scroll + particle.x_vel
+                particle.y += v_scroll + particle.y_vel
 
                 # Shrinking the circle radius
-                particle['radius'] -= 0.3
-                if particle['radius'] < 1:
-                    self.all_particles.remove(particle)
-            
+                particle.radius -= 0.3
+                if particle.radius < 1:
+                    self.free_particles.append(particle)
+                else:
+                    alive.append(particle)
+
+            self.all_particles = alive
             self.last_run = now
 
 
     def draw(self, screen) -> None:
         for particle in self.all_particles:
-            side = int(particle['radius'] * 4)
-            x = int(particle['center'][0] - side/2)
-            y = int(particle['center'][1] - side/2)
-            pg.draw.rect(screen, particle['color'], pg.Rect(x, y, side, side ))
+            side = int(particle.radius * 4)
+            x = int(particle.x - side/2)
+            y = int(particle.y - side/2)
+            pg.draw.rect(screen, particle.color, pg.Rect(x, y, side, side ))
 
 
 # --- Shows the multilevel parallax background
@@ -556,6 +621,9 @@ class ParallaxBackground:
         self.bg_y = {}
         self.copies = {}
 
+        self.distances = [distance for distance in ('far', 'further', 'medium', 'near') if self.background[distance]]  # far to near
+        self.layers = len(self.distances)  # how many of them we draw, the nearest ones (turned down by the QualityGovernor)
+
         self.env_effect = levels[level]['environmental_effect']
         if self.env_effect == 'lightning storm':
             logging.debug(f'Active environmental effect: {self.env_effect}')
@@ -573,15 +641,13 @@ class ParallaxBackground:
             x_size = self.bg_clouds.get_width() * scale
 
             self.bg_clouds = pg.transform.scale(self.bg_clouds, (x_size, SCREEN_HEIGHT))
-            self.bg_white = pg.Surface(self.bg_clouds.get_size())
-            self.bg_white.fill(WHITE)
             self.cloud_width = self.bg_clouds.get_width()  # clouds are potentially much larger
 
             self.cloud_drift =  levels[level]['cloud_drift']
             self.cloud_timer = 0
             self.cloud_movement = 0
 
-            self.bg_sky = self.bg_clouds  # we can replace this to create effects
+            self.lightning = False  # when set, the sky is bright white instead of clouds
          
             # Calculating all the values for each parallax distance
             for distance in self.background:  # ignoring clouds
@@ -598,36 +664,38 @@ class ParallaxBackground:
     def update(self,bg_scroll) -> None:
         self.update_needed = False
         if not self.only_bg_color:
-            now = pg.time.get_ticks()
+            now = game_clock.get_ticks()
 
             if now - self.cloud_timer > self.cloud_drift:
                 self.cloud_movement += 1
 
             
-                # We replace the sky tecture with a bright white surface to indicate lightning
+                # We replace the sky texture with bright white to indicate lightning
                 if self.env_effect == 'lightning storm':
-                    if now - self.last_lighting > self.lightning_timer + randint(5000, 15000):
-                        self.bg_sky = self.bg_white
+                    self.lightning = now - self.last_lighting > self.lightning_timer + rng_env.randint(5000, 15000)
+                    if self.lightning:
                         self.last_lighting = now
-                    else:
-                        self.bg_sky = self.bg_clouds
 
                 x = - self.cloud_width + SCREEN_WIDTH + self.cloud_movement
-                self.full_surf.blit(self.bg_sky,  (x, 0))  # clouds are special  
+                if self.lightning:  # the clouds always cover the whole screen, so a fill does the same as a white surface that size
+                    self.full_surf.fill(WHITE)
+                else:
+                    self.full_surf.blit(self.bg_clouds,  (x, 0))  # clouds are special  
                 if self.cloud_movement >= self.cloud_width - SCREEN_WIDTH:
                     self.cloud_movement = 0
 
             
             # We keep track of parallax scroll speeds and only blit when it's time to shift
-            for distance in ['far', 'further', 'medium', 'near']:  # We specify manually to ensure correct order: far to near
-                if distance != 'clouds' and self.background[distance]:
-                    self.scrolled_dist[distance] += bg_scroll * self.scroll_factor[distance]
+            for count, distance in enumerate(self.distances):  # far to near
+                self.scrolled_dist[distance] += bg_scroll * self.scroll_factor[distance]
 
-                    if self.scrolled_dist[distance] >= self.bg_width[distance] or self.scrolled_dist[distance] <= -self.bg_width[distance]:
-                        self.scrolled_dist[distance] = 0
+                if self.scrolled_dist[distance] >= self.bg_width[distance] or self.scrolled_dist[distance] <= -self.bg_width[distance]:
+                    self.scrolled_dist[distance] = 0
 
-                    for n in range(-1, self.copies[distance] + 1):
-                        self.full_surf.blit(self.bg_surf[distance], (self.scrolled_dist[distance] + n * self.bg_width[distance], self.bg_y[distance]))
+                if count < len(self.distances) - self.layers:  # far layers we leave out, but keep scrolling
+                    continue
+                for n in range(-1, self.copies[distance] + 1):
+                    self.full_surf.blit(self.bg_surf[distance], (self.scrolled_dist[distance] + n * self.bg_width[distance], self.bg_y[distance]))
 
     
     def draw(self, surface) -> None:
@@ -652,19 +720,21 @@ class Weather():
 
 
         self.weather_type = None
+        self.drops_on_screen = 0
 
         if weather in ('lightning storm', 'rain'):
             self.weather_type = 'rain'
             self.weather_delay = 100
-            self.drops_on_screen = 60
+            self.max_drops = 60
+            self.drops_on_screen = self.max_drops
             self.drops = []
             # Movement used both for initial line values and for later animations (x>0 means right, y>0 means down)
             self.x_movement = -3
             self.y_movement =  15
             
             for _ in range(self.drops_on_screen):
-                x1 = randint(0, SCREEN_WIDTH)
-                y1 = randint(0, SCREEN_HEIGHT)
+                x1 = rng_env.randint(0, SCREEN_WIDTH)
+                y1 = rng_env.randint(0, SCREEN_HEIGHT)
                 x2 = x1 + self.x_movement
                 y2 = y1 + self.y_movement
                 color = WHITE
@@ -672,35 +742,47 @@ class Weather():
                 
                 self.drops.append({'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2, 'color': color, 'width': width})
 
+    def set_density(self, density: float) -> None:
+        """ Part of the drops we keep on screen, turned down when frames take too long (see QualityGovernor)
+            Drops are only taken away when they leave the screen, and added back one per update, so it doesn't jump
+        """
+        if self.weather_type == 'rain':
+            self.drops_on_screen = max(int(self.max_drops * density), 1)
+
+    def _new_drop(self) -> dict:
+        x1 = rng_env.randint(0, SCREEN_WIDTH)
+        y1 = 0
+        return {'x1': x1, 'y1': y1, 'x2': x1 + self.x_movement, 'y2': y1 + self.y_movement, 'color': WHITE, 'width': 3}
+
     def update_and_draw(self, h_scroll, v_scroll, surface) -> None:
         if not v_scroll:  # we wait until the player is done with the initial scrolling upon starting a new level
             self.started = True
 
         if self.weather_type == 'rain' and self.started:
-            now = pg.time.get_ticks()
+            now = game_clock.get_ticks()
             if now - self.weather_timer > self.weather_delay:
 
-                for i, particle in enumerate(self.drops):
+                drops = []  # the drops we keep, built as we go instead of removing from the list we're going through
+                excess = len(self.drops) - self.drops_on_screen  # drops we let go of as they leave the screen
+                for particle in self.drops:
                     pg.draw.line(surface, particle['color'], (particle['x1'], particle['y1']), \
                                     (particle['x2'], particle['y2']), particle['width'])
-                    self.drops[i]['x1'] += self.x_movement + h_scroll
-                    self.drops[i]['y1'] += self.y_movement + v_scroll
-                    self.drops[i]['x2'] += self.x_movement + h_scroll
-                    self.drops[i]['y2'] += self.y_movement + v_scroll
+                    particle['x1'] += self.x_movement + h_scroll
+                    particle['y1'] += self.y_movement + v_scroll
+                    particle['x2'] += self.x_movement + h_scroll
+                    particle['y2'] += self.y_movement + v_scroll
 
                     # Checking if the particle is out of bounds and we need to spawn a new one
-                    if not (0 < self.drops[i]['x2'] < SCREEN_WIDTH) or not (0 < self.drops[i]['y2'] < SCREEN_HEIGHT):
-                        if len(self.drops) <= self.drops_on_screen:
-                            x1 = randint(0, SCREEN_WIDTH)
-                            y1 = 0
-                            x2 = x1 + self.x_movement
-                            y2 = y1 + self.y_movement
-                            color = WHITE
-                            width = 3
-                            
-                            self.drops[i] = {'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2, 'color': color, 'width': width}
-                        else:
-                            self.drops.remove(self.drops[i])
+                    if not (0 < particle['x2'] < SCREEN_WIDTH) or not (0 < particle['y2'] < SCREEN_HEIGHT):
+                        if excess > 0:
+                            excess -= 1
+                            continue
+                        particle = self._new_drop()
+                    drops.append(particle)
+
+                if len(drops) < self.drops_on_screen:  # the density has gone back up
+                    drops.append(self._new_drop())
+                self.drops = drops
 
         
 
@@ -731,7 +813,7 @@ class SpeedLines:
             self.done = True
         self.previous_y = self.new_y_pos
 
-        now = pg.time.get_ticks()
+        now = game_clock.get_ticks()
         if now - self.last_update > self.frame_delay:
             self.height = self.new_y_pos - self.y_start 
             if self.height > self.margin:
@@ -741,7 +823,7 @@ class SpeedLines:
         width = 4
         if not self.done and self.height > 10:
             for n in range (self.max_width // width):
-                height = randint(0, self.height)
+                height = rng_fx.randint(0, self.height)
                 pg.draw.rect(screen, WHITE, ((self.x_start + width * n, self.new_y_pos - height), (width, height)))
 
 
@@ -749,14 +831,19 @@ class SpeedLines:
 class Wind:
     """
     Class which simulates wind based on sine waves and returns a list of the wind direction in each vertical lines from 0 to SCREEN_HEIGHT
+    The sine wave never changes, and the field only when the gust strength does - so that's the only time we work it out
     """
+    wave = sine_wave(points=101)  # 101 to make sure we have list indices from 0-100 (not 99), which ius easier to work with
+
     def __init__(self, base_wind) -> None:
         self.wind_field = []
         self.base_wind = base_wind
+        self.gust_strength = None  # of the wind field we have
 
     def update(self, gust_strength) -> list:
         # Returns a list of values from 0 to gust_strength. 0 on both ends, just_strength in the middle
-        field = [wind_point * gust_strength for wind_point in sine_wave(points=101)]  # 101 to make sure we have list indices from 0-100 (not 99), which ius easier to work with
-
-        return field      
+        if gust_strength != self.gust_strength:
+            self.wind_field = [wind_point * gust_strength for wind_point in self.wave]
+            self.gust_strength = gust_strength
+        return self.wind_field
 
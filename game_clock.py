@@ -0,0 +1,107 @@
+"""
+GameClock (class)       : virtual game time, which all timing in the game reads from
+game_clock (GameClock)  : the single clock instance, also found as GameState.clock
+"""
+
+import pygame as pg
+
+
+class GameClock:
+    """ Virtual game clock, replacing direct calls to pygame.time.get_ticks()
+
+        The main loop feeds the real frame time to tick(), and the clock turns it into game time.
+        Game time can be paused, scaled (slow-motion/fast-forward) or advanced manually with step(),
+        which lets headless runs move time forward faster than real time.
+    """
+    def __init__(self) -> None:
+        self.ticks = 0.0  # game time in ms - this is what everybody reads via get_ticks()
+        self.real_ticks = 0.0  # unscaled time in ms - still stops when paused
+        self.time_scale = 1.0  # 1 is normal speed, below 1 is slow-motion, above 1 is fast-forward
+        self.paused = False
+        self.real_time = True  # False for headless runs, where nobody is watching and wait() shouldn't sleep
+        self.pending_wait = 0  # time "spent" in wait() when not in real time, added by the next tick()
+        self.frame_dt = 0.0  # game time added by the last tick/step, in ms
+        self.frame_real_dt = 0.0  # same, but unscaled
+        self.frame_waited = 0  # real ms slept in wait() since the last tick/step, so frame timings can leave it out
+        self.last_real = pg.time.get_ticks()  # wall clock at last update(), only used in real-time mode
+
+    def reset(self, ticks: float=0) -> None:
+        """ Start over at a given game time, with normal speed and not paused """
+        self.ticks = float(ticks)
+        self.real_ticks = float(ticks)
+        self.time_scale = 1.0
+        self.paused = False
+        self.pending_wait = 0
+        self.frame_dt = 0.0
+        self.frame_real_dt = 0.0
+        self.frame_waited = 0
+        self.last_real = pg.time.get_ticks()
+
+    def get_ticks(self) -> int:
+        """ Game time in ms, drop-in replacement for pygame.time.get_ticks() """
+        return int(self.ticks)
+
+    def get_real_ticks(self) -> int:
+        """ Unscaled time in ms, for things that should not be affected by slow-motion """
+        return int(self.real_ticks)
+
+    def update(self) -> float:
+        """ Real-time mode: advance by the wall clock time passed since the last call (once per frame) """
+        now = pg.time.get_ticks()
+        real_dt = now - self.last_real
+        self.last_real = now
+        return self.tick(real_dt)
+
+    def tick(self, dt: float) -> float:
+        """ Advance by dt ms (scaled), unless paused - returns the game time added """
+        self.frame_waited = 0
+        if self.paused:
+            self.frame_dt = 0.0
+            self.frame_real_dt = 0.0
+        else:
+            self._advance(dt)
+        return self.frame_dt
+
+    def step(self, dt: float) -> float:
+        """ Manual stepping: advance by dt ms (scaled) even if paused, for frame-by-frame debugging """
+        self.frame_waited = 0
+        self._advance(dt)
+        return self.frame_dt
+
+    def wait(self, ms: int) -> None:
+        """ Freeze the game for a moment - the time shows up in the next tick(), just like a slow frame would
+            When not in real time, we skip the actual sleep
+        """
+        if self.real_time:
+            self.frame_waited += pg.time.wait(ms)  # picked up by the next update() like any other frame time
+        else:
+            self.pending_wait += ms
+
+    def pause(self) -> None:
+        self.paused = True
+
+    def resume(self) -> None:
+        self.paused = False
+        self.last_real = pg.time.get_ticks()  # we don't want the time spent paused to count as one huge frame
+
+    def toggle_pause(self) -> None:
+        if self.paused:
+            self.resume()
+        else:
+            self.pause()
+
+    def set_scale(self, time_scale: float) -> None:
+        if time_scale < 0:
+            raise ValueError(f'Time scale must not be negative, got {time_scale}')
+        self.time_scale = time_scale
+
+    def _advance(self, dt: float) -> None:
+        dt += self.pending_wait
+        self.pending_wait = 0
+        self.frame_real_dt = dt
+        self.frame_dt = dt * self.time_scale
+        self.ticks += self.frame_dt
+        self.real_ticks += dt
+
+
+game_clock = GameClock()
@@ -61,7 +61,7 @@ stomp_ss = SpriteSheet(pg.image.load('assets/spritesheets/decor/boot-stomping.pn
 """ Create main animation dict 
     Note: this creates ONE animation for each situation. So two objects being assigned the same animation will have 
     pointers to exactly the _same_ animation object (so will be completely in sync always).
-    The only way to get unique copies is to use copy.copy() or make a manual Animation object for each use case
+    To play an animation on its own, use its copy() - copies share the frames and only keep their own place in the animation
 """
 anim = {
     'player': {
@@ -133,4 +133,12 @@ anim = {
         'stomping-foot': Animation(stomp_ss, frames=8, speed=50)
     }
     
-}
\ No newline at end of file
+}
+
+
+def reset_animations() -> None:
+    """ Puts all the shared animations back in their initial state, as if the game had just started """
+    for animations in anim.values():
+        for animation in animations.values():
+            if animation:
+                animation.reset()
\ No newline at end of file
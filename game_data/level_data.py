@@ -36,6 +36,7 @@ level_0 = {
         'down_in_2': [20,21],
         'up_in_1': [7],
         'up_in_2': [22,23],
+        'from_mask': [],  # any other shape, taken from the tile image
     },  
     'moving_horiz': [27],  #  moving platforms
     'moving_vert': [[3,11,19]],  # bobbing platforms (in one group)
@@ -71,6 +72,7 @@ level_1 = {
         'down_in_2': [20,21],
         'up_in_1': [7],
         'up_in_2': [22,23],
+        'from_mask': [],  # any other shape, taken from the tile image
     },  
     'moving_horiz': [27],  #  moving platforms
     'moving_vert': [[3,11,19]],  # bobbing platforms (in one group)
@@ -105,6 +107,7 @@ level_2 = {
         'down_in_2': [20,21],
         'up_in_1': [7],
         'up_in_2': [22,23],
+        'from_mask': [],  # any other shape, taken from the tile image
     },  
     'moving_horiz': [27],  #  moving platforms
     'moving_vert': [[3,11,19]],  # bobbing platforms (in one group)
@@ -23,8 +23,13 @@ WHITE    = (255, 255, 255)
 BLACK    = (  0,   0,   0)
 RED      = (255,   0,   0)
 DARKGRAY = ( 20,  20,  20)
+GRAY     = (160, 160, 160)
+GREEN    = (  0, 255,   0)
+YELLOW   = (255, 255,   0)
+COLORKEYS = ((255, 0, 255), (0, 255, 255), (1, 2, 3))  # transparent colors for images without translucent pixels, first unused one wins
 
 # General constants
+FPS = 60
 SCREEN_WIDTH = 1920
 SCREEN_HEIGHT = 960
 
@@ -33,6 +38,7 @@ SCREEN_HEIGHT = 960
 # Derived values for scaling
 TILE_SIZE = 32  # x and y native resolution of standard tiles - this MUST match the actual resolution in the image file!
 TILE_SIZE_SCREEN = SCREEN_WIDTH // TILE_SIZE
+SLOPE_MARGIN = TILE_SIZE_SCREEN // 2  # slope height profiles reach this far past the tile edges, for colliders centered just outside the tile
 
 GRAVITY = 1
 MAX_PLATFORMS = 10
@@ -48,6 +54,38 @@ ATTACK_SPEED = 1  # UNUSED
 PLAYER_HEALTH = 1000
 PLAYER_STOMP = 5  # monsters to kill before stop recharges
 STOMP_SPEED = 50
+STOMP_EFFECT_VARIANTS = 8  # pre-rendered stomp light effects, each stomp picks one at random
+SLOWMO_TIME_SCALE = 0.2  # game time speed during slow-motion effects (1 is normal speed)
+
+# Tinted frames, made when first needed and kept in a cache (see tinted_image() in animation.py)
+TINTS = {
+    'hit': RED,  # the flash when something gets hit
+    'frozen': (140, 170, 255),  # stunned monsters
+    'damage': (255, 150, 60),  # the player in fire, on spikes etc.
+}
+HIT_FLASH_TIME = 100  # ms a hit flash lasts
+TINT_CACHE_SIZE = 512  # tinted frames kept, the least recently used go first
+
+# Monster scheduling: monsters near the screen are updated every frame, a bit further out less often, the rest sleep
+MONSTER_ACTIVE_MARGIN = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)  # beyond the screen edges, per side (x, y)
+MONSTER_REDUCED_MARGIN = (SCREEN_WIDTH, SCREEN_HEIGHT)  # same, outer limit of the reduced update rate
+MONSTER_REDUCED_RATE = 4  # update every n frames when in the reduced zone
+MONSTER_GRID_CELL = TILE_SIZE_SCREEN * 8  # cell size of the spatial grid we find monsters with
+TRIGGER_GRID_CELL = TILE_SIZE_SCREEN * 4  # same, for pickups, doors, portals etc.
+CULL_MARGIN = TILE_SIZE_SCREEN * 2  # hazards, pickups etc. further off screen than this only scroll, they are not animated
+
+# Adaptive quality: effects are turned down a tier at a time when frames take too long (see QualityGovernor in quality.py)
+QUALITY_GOVERNOR = True
+QUALITY_TIERS = (  # tier 0 is full detail
+    {'blood_particles': 50, 'weather_density': 1.0, 'parallax_layers': 4, 'env_spawn_rate': 1.0},
+    {'blood_particles': 30, 'weather_density': 0.6, 'parallax_layers': 3, 'env_spawn_rate': 0.6},
+    {'blood_particles': 15, 'weather_density': 0.3, 'parallax_layers': 2, 'env_spawn_rate': 0.3},
+    {'blood_particles': 6, 'weather_density': 0.1, 'parallax_layers': 1, 'env_spawn_rate': 0.1},
+)
+QUALITY_FRAME_BUDGET = 1000 / FPS * 0.75  # ms of work per frame, the rest of the frame is for presenting it
+QUALITY_HEADROOM = 0.5  # back up a tier when frames take less than this part of the budget
+QUALITY_WINDOW = 30  # frames averaged
+QUALITY_HOLD = 120  # frames to wait after a change
 MUSIC_ON = False
 SOUNDS_ON = True
 FIRST_LEVEL = 1  # where to start
@@ -55,4 +93,8 @@ LAST_LEVEL = 2  # where to end
 
 # Debug settings
 DEBUG_HITBOXES = False
-SHOW_FPS = True
\ No newline at end of file
+SHOW_FPS = True
+SHOW_PROFILER = False  # frame profiler overlay, can also be toggled in game with F3
+PROFILER_RECENT_FRAMES = 120  # frames in the profiler averages and frame time graph
+PROFILER_REFRESH = 250  # ms between updates of the profiler text
+PROFILER_WIDTH = 480  # width of the profiler overlay
\ No newline at end of file
@@ -32,26 +32,67 @@ def draw_text(text, surface, text_col, x, y, font: pg.font.Font=None, align: str
     surface.blit(img, (x, y))
 
 
+# Screen-sized surfaces of one color for fades and flashes - (color, size): [surface, alpha it's filled with]
+color_overlays = {}
+
+def color_overlay(color, size: tuple, alpha: int) -> pg.Surface:
+    """ A surface of one color at alpha, made once per color and size instead of every time it's needed
+        A fade only refills it when the alpha changes. We keep per-pixel alpha: pygame's per-pixel alpha blit is faster
+        than per-surface alpha on an opaque surface, so it's only the allocation we save.
+    """
+    key = (tuple(pg.Color(color)), tuple(size))
+    overlay = color_overlays.get(key)
+    if overlay is None:
+        overlay = [pg.Surface(size, pg.SRCALPHA).convert_alpha(), None]
+        color_overlays[key] = overlay
+    if overlay[1] != alpha:
+        color = pg.Color(color)
+        color.a = alpha
+        overlay[0].fill(color)
+        overlay[1] = alpha
+    return overlay[0]
+
+
 def fade_to_color(color, screen, gs) -> None:
     # Fades to color
-    now = pg.time.get_ticks()
+    now = gs.clock.get_ticks()
 
     if now - gs.game_fade_last_update > 50 and gs.game_fade_ready:
-        color = pg.Color(color)
         gs.last_fade_update = now
         
-        rect = screen.get_rect()
-        rectsurf = pg.Surface(rect.size,pg.SRCALPHA)
         if gs.game_fade_counter < 255:
-            color.a = gs.game_fade_counter  # we set the alpha of the color, from 0 to 255
+            alpha = gs.game_fade_counter  # from 0 to 255
             gs.game_fade_counter += 10
-            rectsurf.fill(color)
-            screen.blit(rectsurf,(0,0))      
+            screen.blit(color_overlay(color, screen.get_size(), alpha), (0,0))
         else:
             gs.game_fade_counter = 0
             gs.game_fade_ready = False
 
 
+# --- Image formats ---
+def optimize_surface(surface: pg.Surface) -> pg.Surface:
+    """ Converts an image to the cheapest format that draws exactly the same
+        Fully opaque images need no blending at all, so they're converted to the display format. Images where every
+        pixel is either fully opaque or fully transparent (most pixel art) get a colorkey, which is RLE encoded and
+        skips the transparent runs. Only images with translucent pixels keep per-pixel alpha.
+    """
+    size = surface.get_width() * surface.get_height()
+    opaque = pg.mask.from_surface(surface, 254).count()  # alpha 255
+    if opaque == size:
+        return surface.convert()
+
+    if pg.mask.from_surface(surface, 0).count() == opaque:  # no translucent pixels
+        for colorkey in COLORKEYS:
+            keyed = pg.Surface(surface.get_size()).convert()
+            keyed.fill(colorkey)
+            keyed.blit(surface, (0, 0))
+            if pg.mask.from_threshold(keyed, colorkey, (1, 1, 1, 255)).count() == size - opaque:  # the color isn't in the image
+                keyed.set_colorkey(colorkey, pg.RLEACCEL)
+                return keyed
+
+    return surface.convert_alpha()
+
+
 # --- Import CSV data ---
 def import_csv_layout(path :str) -> list:
     # Reads the map CSV files
@@ -96,6 +137,47 @@ def import_tile_sheet_graphics(ss_file :str) -> list:
 
     return tiles
 
+# --- Slopes ---
+SLOPE_SHAPES = {  # height of the surface at the left and right edge of each tile of a slope, in tile heights
+    'down_in_1': ((1, 0),),  # the steepest, gets down in one tile (45 degree)
+    'down_in_2': ((1, 0.5), (0.5, 0)),  # 22.5 degree, in pairs - the first tile number is the left tile of the pair
+    'up_in_1': ((0, 1),),
+    'up_in_2': ((0, 0.5), (0.5, 1)),
+}
+
+def slope_profile_from_mask(surface: pg.Surface, width: int) -> tuple:
+    """ Height of the top opaque pixel in each column of a tile, for width columns on screen (and SLOPE_MARGIN each side) """
+    mask = pg.mask.from_surface(surface)
+    (native_width, native_height) = surface.get_size()
+    scale = TILE_SIZE_SCREEN / native_height  # same scale as the shapes above
+    heights = []
+    for column in range(native_width):
+        top = next((y for y in range(native_height) if mask.get_at((column, y))), native_height)
+        heights.append(round((native_height - top) * scale))
+    heights = [heights[x * native_width // width] for x in range(width)]
+    return tuple([heights[0]] * SLOPE_MARGIN + heights + [heights[-1]] * SLOPE_MARGIN)  # level with the edges outside the tile
+
+def slope_profiles(sloping_tiles: dict, tiles: list) -> dict:
+    """ Height profiles of a level's sloping terrain tiles, worked out once when the level is created
+        returns {tile number: (height of the surface above the bottom of the tile, for each pixel column on screen)}
+        Profiles start SLOPE_MARGIN columns left of the tile and end SLOPE_MARGIN columns right of it, as the player's collider
+        can touch a tile with its center just outside it. The kinds in SLOPE_SHAPES are straight lines (carried on past the edges),
+        tiles listed in sloping_tiles['from_mask'] get their shape from the tile image
+    """
+    profiles = {}
+    h = TILE_SIZE_SCREEN
+    for kind, shape in SLOPE_SHAPES.items():
+        for index, tile_number in enumerate(sloping_tiles.get(kind, ())):
+            width = tiles[tile_number].get_width() * 2  # terrain tiles are scaled up 2x in the TileGrid
+            (left, right) = shape[index % len(shape)]
+            profiles[tile_number] = tuple(round(h * left + (right - left) * x) for x in range(-SLOPE_MARGIN, width + SLOPE_MARGIN))
+
+    for tile_number in sloping_tiles.get('from_mask', ()):
+        profiles[tile_number] = slope_profile_from_mask(tiles[tile_number], tiles[tile_number].get_width() * 2)
+
+    logging.debug(f'Slope profiles for tiles {sorted(profiles)}')
+    return profiles
+
 # --- Load high scores ---
 def load_high_score() -> int:
     """ Load high score from file """
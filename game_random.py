@@ -0,0 +1,39 @@
+"""
+RandomStreams (class)           : named, seedable random number streams
+game_random (RandomStreams)     : the single instance, also found as GameState.random
+"""
+
+import random
+
+
+class RandomStreams:
+    """ Named random number streams, all derived from one seed so runs can be reproduced
+
+        Each part of the game draws from its own stream ('monsters', 'effects' etc.), so extra random
+        calls in the effects don't change what the monsters do. Streams are random.Random instances,
+        and seed() reseeds them in place, so modules can keep a reference to their stream.
+    """
+    def __init__(self) -> None:
+        self.streams = {}
+        self.seed_value = None
+        self.seed()
+
+    def stream(self, name: str) -> random.Random:
+        if name not in self.streams:
+            self.streams[name] = random.Random(self._stream_seed(name))
+        return self.streams[name]
+
+    def seed(self, seed_value: int=None) -> int:
+        """ Reseeds all streams - without a seed we pick a new random one. Returns the seed used """
+        if seed_value is None:
+            seed_value = random.SystemRandom().randrange(2**32)
+        self.seed_value = seed_value
+        for name, stream in self.streams.items():
+            stream.seed(self._stream_seed(name))
+        return seed_value
+
+    def _stream_seed(self, name: str) -> str:
+        return f'{self.seed_value}:{name}'  # strings seed deterministically, unlike hash() of a string
+
+
+game_random = RandomStreams()
@@ -1,29 +1,42 @@
 
+import weakref
+
 import pygame as pg
 
+from game_data.settings import *
+from game_clock import game_clock
+from game_functions import optimize_surface
+
 class GameTile(pg.sprite.Sprite):
 	"""
 	Customized Sprite class which allows update with h_scroll value, which will be triggerd by spritegroup.update(h_scroll)
 	"""
-	def __init__(self, size_x, size_y, x, y, surface, slope=None, slope_pos=None) -> None:
+	moving = False  # only MovingGameTiles move
+	slope = None  # terrain slopes are in the TileGrid (see tile_grid.py)
+	scaled_images = weakref.WeakKeyDictionary()  # tile surface: {size: scaled image}, so all tiles of a kind share one image
+
+	def __init__(self, size_x, size_y, x, y, surface) -> None:
 		# Inherits from basic sprite (always contains an image and a rect)
-		# slope indicates if tile is not flat, and slope_pos is used for other slope angles than 45 degree, where we need
-		# to know where in the multi-tile slope the current tile is
 		super().__init__()
-		self.image = pg.transform.scale(surface, (size_x, size_y)).convert_alpha()
-
-		self.rect = self.image.get_rect(topleft = (x,y))
+		if surface:  # animated tiles get their images from the animation
+			images = GameTile.scaled_images.setdefault(surface, {})
+			if (size_x, size_y) not in images:
+				images[(size_x, size_y)] = optimize_surface(pg.transform.scale(surface, (size_x, size_y)))
+			self.image = images[(size_x, size_y)]
+			self.rect = self.image.get_rect(topleft = (x,y))
 
 		self.solid = True  # some, like water, allows you to fall
-		self.moving = False
-		self.slope = slope  # if we have a slope, we put 1 for 45 degrees up slope, 2 for 22.5 degrees, and same but negative for sloping down
-		self.slope_pos = slope_pos # -1 for left, 1 for right, can be extended later
 
 	def update(self, h_scroll, v_scroll) -> None:
 		# Moves the rectangle of this sprite 
 		self.rect.centerx += h_scroll
 		self.rect.centery += v_scroll
 
+	def scroll(self, h_scroll, v_scroll) -> None:
+		# Only moves along with the screen, for sprites too far off screen to be worth updating (see Level.run_group())
+		self.rect.x += h_scroll
+		self.rect.y += v_scroll
+
 
 class GameTileAnimation(GameTile):
 	"""
@@ -31,24 +44,32 @@ class GameTileAnimation(GameTile):
 	Note that we do not need the surface that the parent needs to generate an image, as the animation does that for us!
 	Also note taht we can have float values for x_vel and y_vel, they only get converted to int when added to x and y pos on update
 	"""
+	transparent_images = {}  # (size_x, size_y): empty image shown while hidden, shared by all animated tiles of that size
+
 	def __init__(self, size_x :int, size_y :int, x :int, y :int, animation: classmethod) -> None:
-		super().__init__(size_x, size_y, x, y, pg.Surface((0,0)))
-		
+		super().__init__(size_x, size_y, x, y, None)
+		self.reset(size_x, size_y, x, y, animation)
+
+	def reset(self, size_x :int, size_y :int, x :int, y :int, animation: classmethod) -> None:
+		# Sets the sprite up as new - also used to reuse killed sprites (see SpritePool)
 		self.animation = animation  # the animation generates images for us
 		self.hidden = False  # we can make things invisible 
 
 		self.image = animation.get_image()
 		self.rect = self.image.get_rect(topleft = (x,y))
-		self.image_tranparent = pg.Surface((size_x, size_y), pg.SRCALPHA)  # Creates an empty per-pixel alpha Surface.
-
+		self.size = (size_x, size_y)
 
-		self.sprites = self.animation.sprites  # contains all sprites in the animation cycle
 		self.animation.active = True
 
 		self.x_vel = 0  # this allows us to keep track of movement speed (not pos)
 		self.y_vel = 0
 
 		self.name = ''  # This allows us to store the type (like "health potion") in this object
+
+	@property
+	def mask(self) -> pg.mask.Mask:
+		# Collision mask of the frame on show (hazards), made once per animation frame
+		return self.animation.get_mask()
         
 	def update(self, h_scroll, v_scroll) -> None:
 		# Moves the rectangle of this sprite 
@@ -58,27 +79,25 @@ class GameTileAnimation(GameTile):
 		self.rect.y += int(self.y_vel)
 		
 		if not self.hidden:
-			self.image = self.animation.get_image().convert_alpha()
+			self.image = self.animation.get_image()
 		else:
-			self.image = self.image_tranparent
+			if self.size not in GameTileAnimation.transparent_images:
+				GameTileAnimation.transparent_images[self.size] = pg.Surface(self.size, pg.SRCALPHA)  # Creates an empty per-pixel alpha Surface.
+			self.image = GameTileAnimation.transparent_images[self.size]
 
 class MovingGameTile(GameTile):
 	"""
 	Customized Sprite class which allows self-moving tiles (like platforms) which update with h_scroll value, which will be triggerd by spritegroup.update(h_scroll)
 	"""
+	moving = True
+
 	def __init__(self, size_x, size_y, x, y, speed, distance, surface) -> None:
 		# Basic static sprite (always contains an image and a rect)
 		super().__init__(size_x, size_y, x, y, surface)
-		self.image = pg.transform.scale(surface, (size_x, size_y)).convert_alpha()
 		self.speed = speed
 		self.distance = distance
-		self.moving = True
 		self.direction = 1  # 1 is to the right, -1 to the left
 
-		self.rect = self.image.get_rect(topleft = (x,y))
-
-		self.solid = True  # some, like water, allows you to fall
-
 		self.last_move = 0
 		self.dist_moved = 0
 
@@ -90,7 +109,7 @@ class MovingGameTile(GameTile):
 		self.rect.centerx += h_scroll
 		self.rect.centery += v_scroll
 
-		now = pg.time.get_ticks()
+		now = game_clock.get_ticks()
 		if now - self.last_move > 30:
 			self.last_move = now
 			# print(f'{self.rect.centerx=}, {self.x_start_pos=} {self.distance=}')
@@ -7,6 +7,10 @@ from game_functions import *
 from level import Level
 from game_data.level_data import GameAudio  
 from decor_and_effects import GamePanel
+from game_clock import GameClock, game_clock
+from game_random import RandomStreams, game_random
+from profiler import FrameProfiler
+from quality import QualityGovernor
 
 class GameState:
     """
@@ -41,10 +45,18 @@ class GameState:
         self.game_fade_ready: bool
         self.game_fade_last_update: int
         self.game_slowmo: bool
+        self.clock: GameClock  # all timing reads from here, not pygame.time.get_ticks()
+        self.random: RandomStreams  # all randomness in the game draws from these streams
+        self.profiler: FrameProfiler  # per-stage frame timings, only recorded when enabled
+        self.quality: QualityGovernor  # turns effects down when frames take too long
 
         # Specific arena variables to manually spawn monsters
         self.monster_spawn_queue: list
         
+        self.clock = game_clock  # not part of reset(), as time keeps running across games
+        self.random = game_random
+        self.profiler = FrameProfiler()
+        self.quality = QualityGovernor(self.clock, self.profiler)  # like the clock, not part of reset(): the machine doesn't get faster
         self.reset()
 
     
@@ -101,6 +113,7 @@ class Game:
         
         self.level_audio = None
         self.faded = False
+        self.recorder = None  # InputRecorder (see replay.py), if we're recording
         
         # user interface 
         self.panel = GamePanel(self.screen, self.gs)
@@ -119,9 +132,17 @@ class Game:
         self.last_run = 0
         self.last_fade_update = 0
 
-    def create_level(self,current_level) -> None:
-        """ Create each level """
+    def create_level(self,current_level, seed: int=None) -> None:
+        """ Create each level - with the same seed (and input), a level plays out the same way every time """
+        from game_data.animation_data import reset_animations
+
         self.gs.level_current = current_level
+        self.gs.game_slowmo = False
+        self.gs.clock.set_scale(1)
+        reset_animations()  # the shared animations would otherwise carry over their state from the last level
+        self.gs.random.seed(seed)
+        if self.recorder:
+            self.recorder.start(self.gs)
         self.level = Level(self.screen, self.gs)
         
         if MUSIC_ON:
@@ -146,16 +167,15 @@ class Game:
 
     def check_damage_effects(self) -> None:
         """ Slow-motion effect after player loses health """
-        global FPS
         if self.gs.game_slowmo is True:
             self.screen.blit(self.damage_img, (0,0))
-            if pg.time.get_ticks() - self.last_run > 500:  # 1 second of slow-motion after a hit
-                FPS = 60
+            if self.gs.clock.get_real_ticks() - self.last_run > 500:  # half a second (real time, not slowed down) of slow-motion after a hit
+                self.gs.clock.set_scale(1)
                 self.gs.game_slowmo = False 
         elif self.gs.player_hit:
-            FPS = 10
+            self.gs.clock.set_scale(SLOWMO_TIME_SCALE)
             self.gs.game_slowmo = True
-            self.last_run = pg.time.get_ticks()
+            self.last_run = self.gs.clock.get_real_ticks()
             self.gs.player_hit = False
             # TODO: add slo-mo for stomp as well, and player boss death
 
@@ -241,9 +261,20 @@ class Game:
             fade_to_color(BLACK, self.screen, self.gs)  # fade to black
         else:
             """ Run the game """
+            profiler = self.gs.profiler
+            profiler.start_frame()
+            self.gs.quality.start_frame()
             self.level.run()
+            profiler.start('hud')
+            profiler.start('damage effects')
             self.check_damage_effects()
+            profiler.stop()
+            profiler.start('panel')
             self.panel.draw()
+            profiler.stop()
+            profiler.stop()
+            self.gs.quality.end_frame()
+            profiler.end_frame()
             self.check_level_complete()
             self.check_game_over()
 
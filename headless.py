@@ -0,0 +1,160 @@
+"""
+Headless simulation - runs a level with no window, no sound and no waiting for the next frame
+
+InputScript (class)     : scripted player input, read from a simple text file
+HeadlessGame (class)    : sets up Game/Level on SDL's dummy drivers and steps the simulation as fast as the CPU allows
+
+Usage: python headless.py --level 1 --frames 3600 --script my_run.txt --seed 42
+       python headless.py --replay my_run.phr   (a recording made with phflorg.py --record my_run.phr)
+
+Script files have one input change per line, '#' starts a comment:
+    <frame> <input> <on|off>    e.g. '120 right on' - input is any key in GameState.user_input
+    <frame> spawn <monster>     e.g. '300 spawn 4' - arena only, same as pressing 1-5
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'  # pygame's banner goes to stdout, where scripts may want only their own output
+import pygame as pg
+
+from game_data.settings import *
+from replay import InputReplay
+
+
+class InputScript:
+    """ Scripted input, fed into GameState.user_input (and the arena spawn queue) frame by frame """
+    def __init__(self, events: list=None) -> None:
+        self.events = {}  # frame number: list of (input, value) changes
+        for frame, name, value in events or []:
+            self.add(frame, name, value)
+
+    def add(self, frame: int, name: str, value) -> None:
+        self.events.setdefault(frame, []).append((name, value))
+
+    @classmethod
+    def load(cls, path: str) -> 'InputScript':
+        script = cls()
+        with open(path) as script_file:
+            for line_number, line in enumerate(script_file, start=1):
+                line = line.split('#')[0].strip()
+                if not line:
+                    continue
+                try:
+                    frame, name, value = line.split()
+                    if name == 'spawn':
+                        value = int(value)
+                    elif value in ('on', 'off'):
+                        value = value == 'on'
+                    else:
+                        raise ValueError(f'expected on/off, got "{value}"')
+                    script.add(int(frame), name, value)
+                except ValueError as error:
+                    raise ValueError(f'{path}, line {line_number}: unable to read "{line}" ({error})')
+        return script
+
+    def apply(self, frame: int, gs) -> None:
+        for name, value in self.events.get(frame, []):
+            if name == 'spawn':
+                gs.monster_spawn_queue.append(value)
+            elif name in gs.user_input:
+                gs.user_input[name] = value
+            else:
+                logging.error(f'Unknown scripted input "{name}" in frame {frame}')
+
+
+def init_headless() -> pg.Surface:
+    """ Initializes pygame with the dummy video and audio drivers and returns the surface the game draws on """
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'  # has to be in place before pygame sets up the display
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    pg.mixer.pre_init(44100, -16, 2, 512)
+    pg.init()
+    pg.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))  # never shown, but needed for convert()/convert_alpha()
+    return pg.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+
+class HeadlessGame:
+    """ Runs Game/Level without presenting anything, stepping game time by a fixed amount per frame
+        With a replay, the level, seed, input and frame times all come from the recording instead
+    """
+    def __init__(self, level: int=FIRST_LEVEL, script: InputScript=None, frame_ms: float=1000 / FPS, seed: int=None, replay: InputReplay=None) -> None:
+        self.screen = init_headless()
+
+        from game_world import GameState, Game  # after init, as the game loads images at import
+
+        self.gs = GameState()
+        self.gs.clock.real_time = False  # no sleeping in wait(), we only move game time forward
+        self.gs.quality.enabled = False  # full detail, so runs look the same on every machine
+        self.gs.clock.reset()
+
+        self.script = script if script else InputScript()
+        self.replay = replay
+        self.frame_ms = frame_ms
+        self.frame = 0
+
+        self.game = Game(self.gs, self.screen)
+        if replay:
+            level = replay.level
+            seed = replay.seed
+            replay.before_level(self.gs)
+        self.game.create_level(level, seed=seed)
+        self.gs.game_state = GS_PLAYING
+        self.level = self.game.level
+        if replay:
+            replay.after_level(self.gs, self.level)
+
+    def step(self) -> bool:
+        """ Runs one frame - returns False once we're no longer playing (level complete, game over etc.) """
+        if self.replay:
+            if self.frame >= len(self.replay):
+                return False
+            self.replay.apply(self.frame, self.gs)
+        else:
+            self.script.apply(self.frame, self.gs)
+
+        if self.gs.game_state == GS_PLAYING:
+            self.game.run()
+
+        if self.replay:
+            self.replay.advance_clock(self.frame, self.gs.clock)
+        else:
+            self.gs.clock.tick(self.frame_ms)
+        self.frame += 1
+        return self.gs.game_state == GS_PLAYING
+
+    def run(self, frames: int) -> int:
+        """ Runs up to frames frames, returns the number of frames actually run """
+        for _ in range(frames):
+            if not self.step():
+                break
+        return self.frame
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run Phflorg headless, as fast as possible')
+    parser.add_argument('--level', type=int, default=FIRST_LEVEL, help='level to run (0 is the arena)')
+    parser.add_argument('--frames', type=int, default=FPS * 60, help='maximum number of frames to run')
+    parser.add_argument('--script', help='input script file')
+    parser.add_argument('--seed', type=int, help='random seed, for runs that play out the same every time')
+    parser.add_argument('--replay', help='replay file recorded with phflorg.py --record (overrides level, script and seed)')
+    parser.add_argument('--debug', action='store_true', help='show debug logging')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO)
+
+    script = InputScript.load(args.script) if args.script else None
+    replay = InputReplay.load(args.replay) if args.replay else None
+    frames = len(replay) if replay else args.frames
+    headless = HeadlessGame(args.level, script, seed=args.seed, replay=replay)
+
+    start = time.perf_counter()
+    frames = headless.run(frames)
+    duration = time.perf_counter() - start
+
+    logging.info(f'Ran {frames} frames ({frames * headless.frame_ms / 1000:.1f}s of game time) in {duration:.2f}s, {frames / duration:.0f} frames per second')
+    logging.info(f'Score: {headless.gs.player_score}, health: {headless.gs.player_health}, game state: {headless.gs.game_state}')
+    pg.quit()
+    sys.exit(0)
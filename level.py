@@ -5,19 +5,23 @@ GameTileAnimation (GameTile class)  : animated background tiles (flames, torches
 GamePanel(class)                    : contans the player information for the screen - score, health etc.
 """
 
+import math
 import pygame as pg
 import logging
-import random
 
 from game_data.settings import *
 from decor_and_effects import *
 from game_functions import *
 
-from game_tiles import GameTile, GameTileAnimation, MovingGameTile
+from game_tiles import GameTile, GameTileAnimation
+from tile_grid import TileGrid
 from game_data.level_data import levels, GameAudio
 from game_data.monster_data import known_monsters
 from player import Player, PlayerInOut
-from monsters import Monster, Projectile, Spell, Drop
+from monsters import Monster, MonsterScheduler, Projectile, Spell, Drop
+from pools import SpritePool
+from render import RenderQueue
+from collision import BroadPhase, TriggerZones, CONTACT_TYPES, TRIGGER_ENTER, TRIGGER_EXIT, mask_hits_rect
 
 from game_data.monster_data import arrow_damage
 
@@ -32,6 +36,7 @@ class Level():
 
         # general setup
         self.screen = surface
+        self.render_queue = RenderQueue(self.screen)  # the sprite groups are drawn through this, see run()
         self.h_scroll = 0
         self.v_scroll = 0
 
@@ -52,6 +57,7 @@ class Level():
 
         # Import all the tile PNGs
         self.terrain_tilesheet_list = import_tile_sheet_graphics(self.level_data['terrain_ts'])  # these are the new format tiles
+        self.slope_profiles = slope_profiles(self.level_data['sloping_tiles'], self.terrain_tilesheet_list)  # ground height across each sloping tile
         self.decorations_tile_list = import_tile_graphics('assets/tile/decorations/*.png')
         self.hazards_tile_list = import_tile_graphics('assets/tile/hazards/*.png')
         self.pickups_tile_list = import_tile_graphics('assets/tile/pickups/*.png')
@@ -66,10 +72,10 @@ class Level():
         player_in_out_layout = import_csv_layout(self.level_data['pos_player'])
         self.player_in_out_sprites = self.create_tile_group(player_in_out_layout,'pos_player')
 
-        # terrain setup
+        # terrain setup - a grid, not sprites, as there are thousands of tiles (see tile_grid.py)
+        # NOTE: there is really no limit to size - the program can accept any size of level
         terrain_layout = import_csv_layout(self.level_data['pos_terrain'])
-        self.terrain_sprites = self.create_tile_group(terrain_layout,'pos_terrain')
-        #self.terrain_surface = self.create_terrain_surface(terrain_layout)
+        self.terrain = TileGrid(terrain_layout, self.terrain_tilesheet_list, self.level_data['solid_tiles'], self.level_data['moving_horiz'], self.slope_profiles)
 
         # decorations setup 
         decorations_layout = import_csv_layout(self.level_data['pos_decorations'])
@@ -91,12 +97,13 @@ class Level():
         # monsters 
         monsters_layout = import_csv_layout(self.level_data['pos_monsters'])
         self.monsters_sprites = self.create_tile_group(monsters_layout,'pos_monsters')
-        self.monsters_nearby = pg.sprite.Group()
+        self.monster_scheduler = MonsterScheduler(self.monsters_sprites)
+        self.monsters_nearby = self.monster_scheduler.active  # the monsters near the screen, which we update and check every frame
 
         # ---> Composite map groups
-        # group of all (potential) collision sprites for monsters - mostly terrain, but also things like doors, barriers and hazards
+        # group of all (potential) collision sprites for monsters, besides the terrain - things like doors, barriers and hazards
         self.collision_sprites = pg.sprite.Group()
-        self.collision_sprites.add(self.terrain_sprites.sprites() + self.triggered_objects_sprites.sprites() + self.hazards_sprites.sprites())
+        self.collision_sprites.add(self.triggered_objects_sprites.sprites() + self.hazards_sprites.sprites())
 
         # ---> Sprites not loaded from the map (projectiles, spels, panels etc.)
 
@@ -118,7 +125,7 @@ class Level():
 
         # environmental effects (leaves, snow etc.)
         self.gs.level_weather = self.level_data['environmental_effect']
-        self.env_sprites = EnvironmentalEffects(self.level_data['environmental_effect'], self.screen)  # 'leaves' for lvl1
+        self.env_effects = EnvironmentalEffects(self.level_data['environmental_effect'], self.screen)  # 'leaves' for lvl1
         
         self.weather_effets = Weather(self.gs.level_weather)
         
@@ -139,6 +146,31 @@ class Level():
 
         # particle system
         self.particle_system = ParticleSystem()
+        self.blood_particles = 50  # per burst
+
+        # effects are turned down when frames take too long (see QualityGovernor)
+        self.quality_tier = None
+        self.apply_quality()
+
+        # Things made and killed all the time in fights are reused instead of made from scratch
+        self.projectile_pool = SpritePool(Projectile)
+        self.spell_pool = SpritePool(Spell)
+        self.drop_pool = SpritePool(Drop)
+        self.dust_pool = SpritePool(GameTileAnimation)
+
+        # broad phase collision detection between the player and everything that moves around
+        self.broad_phase = BroadPhase()
+        self.contacts = {contact_type: [] for contact_type in CONTACT_TYPES}
+
+        # trigger zones - what happens when the player walks into pickups, doors, portals, the exit and drops
+        self.trigger_zones = TriggerZones()
+        for pickup in self.pickups_sprites:
+            self.trigger_zones.add('pickup', pickup)
+        for sprite in self.triggered_objects_sprites:
+            self.trigger_zones.add('triggered object', sprite)
+        for sprite in self.player_in_out_sprites:
+            if sprite.inout == 'out':
+                self.trigger_zones.add('exit', sprite, use_body=True)
 
         
         # player
@@ -175,7 +207,7 @@ class Level():
             for count, monster in enumerate(self.gs.monster_spawn_queue):
                 if monster < len(known_monsters) + 1:
                     try:
-                        self.monsters_nearby.add(Monster(SCREEN_WIDTH * 0.8, SCREEN_HEIGHT * 0.8, self.screen, known_monsters[monster-1]))
+                        self.monster_scheduler.add(Monster(SCREEN_WIDTH * 0.8, SCREEN_HEIGHT * 0.8, self.screen, known_monsters[monster-1]))
                     except KeyError:
                         logging.error(f'Tried to call {known_monsters[monster-1]}')
                 self.gs.monster_spawn_queue.pop(count)
@@ -198,20 +230,35 @@ class Level():
         if self.player.vel_y == 0 and self.previous_vel_y > STOMP_SPEED * 0.8 and not self.player.on_slope:
             width = 52
             height = 16
-            self.dust_jump = GameTileAnimation(width, height, self.player.rects['hitbox'].centerx - width, self.player.rects['hitbox'].bottom - (height + 4), self.anim['effects']['dust-landing'])
+            self.dust_jump = self.dust_pool.get(self.effect_sprites, width, height, self.player.rects['hitbox'].centerx - width, self.player.rects['hitbox'].bottom - (height + 4), self.anim['effects']['dust-landing'])
             self.dust_jump.name = 'dust'
             self.dust_jump.animation.start_over()
             self.previous_vel_y = 0  # to avoid dupes
-            self.effect_sprites.add(self.dust_jump)
         
         # Housekeeping
         for sprite in self.effect_sprites.sprites():
             if sprite.name == 'dust' and sprite.animation.on_last_frame:
                 sprite.kill()
     
+    def find_contacts(self) -> None:
+        """ Finds what touches what for the collision checks below, using one broad phase pass """
+        self.broad_phase.clear()
+        self.broad_phase.add('player', self.player, self.player.rects['hitbox'])
+        if self.player.state['active'] == ATTACKING:
+            self.broad_phase.add('attack', self.player, self.player.rects['attack'])
+        if self.stomp_effects.sprite:
+            self.broad_phase.add('stomp', self.stomp_effects.sprite, self.stomp_effects.sprite.rect)
+        for monster in self.monsters_nearby:
+            self.broad_phase.add('monster', monster, monster.hitbox)
+        for projectile in self.projectile_sprites:
+            self.broad_phase.add('projectile', projectile, projectile.rect)
+        for spell in self.spell_sprites:
+            self.broad_phase.add('spell', spell, spell.rect)
+        self.contacts = self.broad_phase.find_contacts()
+
     def check_player_attack(self) -> None:
-        for monster in self.monsters_nearby.sprites():
-            # --> We check if the player is attacking and if the attack hits a monster
+        for _, monster in self.contacts[('attack', 'monster')]:
+            # --> We check if the player is attacking and if the attack hits a monster (an earlier hit this frame empties the attack rect)
             if self.player.state['active'] == ATTACKING \
                 and monster.state not in (DYING, DEAD) \
                 and monster.invulnerable is False \
@@ -226,8 +273,8 @@ class Level():
                         self.gs.player_stomp_counter += 1
                         """ Adding drops from player death """
                         if monster.data.monster == 'skeleton-keybearer':
-                            drop_key = Drop( monster.hitbox.centerx, monster.hitbox.centery - 25 , self.anim['pickups']['key'], turned = False, scale = 2, drop_type='key',)
-                            self.drops_sprites.add(drop_key)
+                            drop_key = self.drop_pool.get(self.drops_sprites, monster.hitbox.centerx, monster.hitbox.centery - 25 , self.anim['pickups']['key'], turned = False, scale = 2, drop_type='key',)
+                            self.trigger_zones.add('drop', drop_key)
                             logging.debug(f'{monster.data.monster} dropped a key')
                             monster.state_change(DYING)  # we do this _after_ key drop, as the hitbox disappears when the mob enters DYING state
                         else:
@@ -239,119 +286,131 @@ class Level():
                         self.player.rects['attack'] = pg.Rect(0,0,0,0)
                         self.player.state['next'] = IDLE
 
-    def check_player_win(self) -> None:
-        # Player sprite reaches goal tile
-        if pg.sprite.spritecollide(self.player,self.player_in_out_sprites,False) \
-            and pg.sprite.spritecollide(self.player,self.player_in_out_sprites,False)[0].inout == 'out':  # first colliding sprite
-                logging.debug('WIN! Level complete')
-                self.gs.level_complete = True
-
     def check_coll_player_hazard(self) -> None:
-        # Player + hazard group collision 
-        if pg.sprite.spritecollide(self.player.hitbox_sprite,self.hazards_sprites,False) and self.player.state['active'] not in (DYING, DEAD):
+        # Player + hazard group collision - rects first, then the hazard's mask for the ones that overlap
+        hitbox = self.player.rects['hitbox']
+        if self.player.state['active'] not in (DYING, DEAD) \
+        and any(hazard.rect.colliderect(hitbox) and mask_hits_rect(hazard.mask, hazard.rect.topleft, hitbox) for hazard in self.hazards_sprites):
             self.player.hazard_damage(100, hits_per_second=10)
             self.bubble_list.append(BubbleMessage(self.screen, 'Ouch! Ouch!', 1000, 0, 'spikes', self.player))
 
     def check_coll_player_projectile(self) -> None:
     # Player + projectile collision (arrows etc.) AND player's attack collision (so attacking arrows in flight for example)
-        if pg.sprite.spritecollide(self.player.hitbox_sprite,self.projectile_sprites,False) and self.player.state['active'] != DYING:
-            for projectile in pg.sprite.spritecollide(self.player.hitbox_sprite,self.projectile_sprites,False):
+        if self.player.state['active'] != DYING:
+            for _, projectile in self.contacts[('player', 'projectile')]:
+                if not mask_hits_rect(projectile.mask, projectile.rect.topleft, self.player.rects['hitbox']):
+                    continue  # the rects overlap, but not the arrow itself
                 self.particles_blood(self.player.rects['hitbox'].centerx, self.player.rects['hitbox'].centery, RED, projectile.turned)  # add blood particles whne player is hit
-                self.player.hit(self.arrow_damage, projectile.turned, self.terrain_sprites)
+                self.player.hit(self.arrow_damage, projectile.turned, self.terrain)
                 projectile.kill()
-        for projectile in self.projectile_sprites.sprites():
+        for _, projectile in self.contacts[('attack', 'projectile')]:
             # We can attack and destroy projectiles as well
-            if self.player.state['active'] == ATTACKING \
+            if projectile.alive() \
+            and self.player.state['active'] == ATTACKING \
             and pg.Rect.colliderect(self.player.rects['attack'], projectile.rect):
                     # play some sound # TODO
                     projectile.kill()
 
     def check_coll_player_spell(self) -> None:
         # Player + spell collision
-        if pg.sprite.spritecollide(self.player.hitbox_sprite,self.spell_sprites,False) and self.player.state['active'] != DYING:
-            for _ in pg.sprite.spritecollide(self.player,self.spell_sprites,False):
-                self.player.hazard_damage(100, hits_per_second=2)
+        if self.player.state['active'] != DYING:
+            for _, spell in self.contacts[('player', 'spell')]:
+                if mask_hits_rect(spell.mask, spell.rect.topleft, self.player.rects['hitbox']):
+                    self.player.hazard_damage(100, hits_per_second=2)
     
-    def check_coll_player_pickup(self) -> None:
+    def check_triggers(self) -> None:
+        """ Pickups, drops, doors, portals and the level exit - driven by the player entering, staying in and leaving their zones """
+        for event, kind, sprite in self.trigger_zones.update(self.player.rects['hitbox'], self.player.rect):
+            if kind == 'exit':
+                if event != TRIGGER_EXIT:  # Player sprite reaches goal tile
+                    logging.debug('WIN! Level complete')
+                    self.gs.level_complete = True
+            elif self.player.state['active'] == DYING or event == TRIGGER_EXIT:
+                continue  # nothing happens when we leave these, or if we're dying
+            elif kind == 'pickup' and event == TRIGGER_ENTER:
+                self.trigger_pickup(sprite)
+            elif kind == 'triggered object':
+                self.trigger_object(sprite, event)
+            elif kind == 'drop' and event == TRIGGER_ENTER:
+                self.trigger_drop(sprite)
+
+    def trigger_pickup(self, pickup) -> None:
         # Animated objects pickup / collision
-        if pg.sprite.spritecollide(self.player.hitbox_sprite,self.pickups_sprites,False) and self.player.state['active'] != DYING:
-            for pickup in pg.sprite.spritecollide(self.player,self.pickups_sprites,False):
-                if pickup.name == 'health potion':
-                    self.audio.pickups['health'].play()
-                    self.player.heal(500)
-                    pickup.kill()
-                if pickup.name == 'stomp potion':
-                    self.audio.pickups['stomp'].play()
-                    self.gs.player_stomp_counter = PLAYER_STOMP
-                    pickup.kill()
-                if pickup.name == 'mana potion':
-                    self.audio.pickups['mana'].play()
-                    self.player.mana += 100
-                    pickup.kill()
-
-    def check_coll_player_triggered_objects(self) -> None:
-        if pg.sprite.spritecollide(self.player.hitbox_sprite,self.triggered_objects_sprites,False) and self.player.state['active'] != DYING:
-            for sprite in pg.sprite.spritecollide(self.player,self.triggered_objects_sprites,False):
-                if sprite.name in ('door-left', 'door-right', 'end-of-level'):
-                        if any('key' in sublist for sublist in self.gs.player_inventory): # do we have key?
-                            sprite.animation.frame_number = 0
-                            self.bubble_list.append(BubbleMessage(self.screen, 'And that was the lock...', 3000, 0, 'exit', self.player))
-                        else:
-                            self.player.bounce(-10, 0, -self.player.turned, self.terrain_sprites)
-                            self.bubble_list.append(BubbleMessage(self.screen, 'I\'m missing a key!', 3000, 0, 'exit', self.player))
-                            #self.info_sprites.add(InfoPopup('Locked door', sprite.rect.centerx, sprite.rect.centery))
-                elif sprite.name == 'chest':
-                    # play some sound effect
-                    sprite.animation.active = True
-                elif sprite.name == 'IN portal':
-                    self.audio.triggers['portal'].play()
-
-                    #print(self.out_portal_coordinates)
-                    self.player.destination = self.out_portal_coordinates
-
-                elif sprite.name == 'OUT portal':
-                    pass  # we ignore the out portals
-                else:
-                    logging.error(f'Triggered object "{sprite.name} not know - aborting...')
-                    exit(1)
-
-    def check_coll_player_drops(self) -> None:
+        if pickup.name == 'health potion':
+            self.audio.pickups['health'].play()
+            self.player.heal(500)
+            pickup.kill()
+        if pickup.name == 'stomp potion':
+            self.audio.pickups['stomp'].play()
+            self.gs.player_stomp_counter = PLAYER_STOMP
+            pickup.kill()
+        if pickup.name == 'mana potion':
+            self.audio.pickups['mana'].play()
+            self.player.mana += 100
+            pickup.kill()
+        if not pickup.alive():
+            self.trigger_zones.remove(pickup)
+
+    def trigger_object(self, sprite, event: str) -> None:
+        # Doors keep pushing us back (or stay open) as long as we're in them, the rest only react when we walk in
+        if sprite.name in ('door-left', 'door-right', 'end-of-level'):
+            if any('key' in sublist for sublist in self.gs.player_inventory): # do we have key?
+                sprite.animation.frame_number = 0
+                self.bubble_list.append(BubbleMessage(self.screen, 'And that was the lock...', 3000, 0, 'exit', self.player))
+            else:
+                self.player.bounce(-10, 0, -self.player.turned, self.terrain)
+                self.bubble_list.append(BubbleMessage(self.screen, 'I\'m missing a key!', 3000, 0, 'exit', self.player))
+                #self.info_sprites.add(InfoPopup('Locked door', sprite.rect.centerx, sprite.rect.centery))
+        elif event != TRIGGER_ENTER:
+            pass
+        elif sprite.name == 'chest':
+            # play some sound effect
+            sprite.animation.active = True
+        elif sprite.name == 'IN portal':
+            self.audio.triggers['portal'].play()
+
+            #print(self.out_portal_coordinates)
+            self.player.destination = self.out_portal_coordinates
+
+        elif sprite.name == 'OUT portal':
+            pass  # we ignore the out portals
+        else:
+            logging.error(f'Triggered object "{sprite.name} not know - aborting...')
+            exit(1)
+
+    def trigger_drop(self, drop) -> None:
     # Dropped objects pickup / collision
-        if pg.sprite.spritecollide(self.player.hitbox_sprite,self.drops_sprites,False) and self.player.state['active'] != DYING:
-            for drop in pg.sprite.spritecollide(self.player.hitbox_sprite,self.drops_sprites,False):
-                if drop.drop_type == 'key':
-                    self.gs.player_inventory.append(('key', self.key_img))  # inventory of items and their animations
-                    self.audio.pickups['key'].play()
-                    drop.kill()
-                    self.bubble_list.append(BubbleMessage(self.screen, 'A key! All I need now is a lock.', 3000, 3000, 'key', self.player))
+        if drop.drop_type == 'key':
+            self.gs.player_inventory.append(('key', self.key_img))  # inventory of items and their animations
+            self.audio.pickups['key'].play()
+            drop.kill()
+            self.trigger_zones.remove(drop)
+            self.bubble_list.append(BubbleMessage(self.screen, 'A key! All I need now is a lock.', 3000, 3000, 'key', self.player))
                
-                logging.debug(f'PICKUP: {drop.drop_type}')
-                logging.debug(f'Inventory: {self.gs.player_inventory}')   
+        logging.debug(f'PICKUP: {drop.drop_type}')
+        logging.debug(f'Inventory: {self.gs.player_inventory}')   
 
     def check_coll_stomp_monster(self) -> None:
         # Mobs caught in stomp blast effect
-        if self.stomp_effects.sprite:
-            stomp_collision = pg.sprite.spritecollide(self.stomp_effects.sprite, self.monsters_nearby,False)
-            if stomp_collision:
-                for monster in stomp_collision:
-                    if monster.state not in (DYING, DEAD) and pg.Rect.colliderect(self.stomp_effects.sprite.rect, monster.hitbox): 
-                            monster.state_change(STUNNED, player_pos=self.player.rect.center, deadly=True)
-                            self.gs.player_score += monster.data.points_reward
-                            self.player.stomp_counter += 1
-                            logging.debug(f'{monster.data.monster} killed by player stomp')
+        for _, monster in self.contacts[('stomp', 'monster')]:
+            if monster.state not in (DYING, DEAD): 
+                    monster.state_change(STUNNED, player_pos=self.player.rect.center, deadly=True)
+                    self.gs.player_score += monster.data.points_reward
+                    self.player.stomp_counter += 1
+                    logging.debug(f'{monster.data.monster} killed by player stomp')
 
     def check_coll_player_monster(self) -> None:
         # Player + mobs group collision
-        monster_collisions = pg.sprite.spritecollide(self.player.hitbox_sprite, self.monsters_nearby,False)
-        if monster_collisions and self.player.state['active'] not in (DYING, STOMPING):
-            for monster in monster_collisions:
+        if self.player.state['active'] not in (DYING, STOMPING):
+            for _, monster in self.contacts[('player', 'monster')]:
+                # (re-test the hitbox: an earlier hit this frame may have bounced the player clear)
                 if monster.state not in (DYING, DEAD, STOMPING) \
                     and pg.Rect.colliderect(self.player.rects['hitbox'], monster.hitbox):
-                        self.player.hit(100, monster.turned, self.terrain_sprites)  # bump player _away_ from monster
+                        self.player.hit(100, monster.turned, self.terrain)  # bump player _away_ from monster
 
     def check_monsters(self) -> None:
         # Monsters can be up to several things, which we check for here
-        now = pg.time.get_ticks()
+        now = self.gs.clock.get_ticks()
         for monster in self.monsters_nearby.sprites():
             if monster.state not in (DYING , DEAD):  # only dealing with the living
                 #  --> casting spells=
@@ -359,7 +418,7 @@ class Level():
                     for spell in monster.cast_anim_list:
                         if spell[0] == 'fire':
                             x, y = spell[1:3]
-                            self.spell_sprites.add(Spell(x,y, self.anim['fire']['fire-spell'], False, scale=1))
+                            self.spell_pool.get(self.spell_sprites, x,y, self.anim['fire']['fire-spell'], False, scale=1)
                     monster.cast_anim_list = []
 
                 # --> detecting (or no longer detecting) the player and switch to/from ATTACK mode
@@ -373,13 +432,12 @@ class Level():
                 # --> attacking the player and hitting or not the player's hitbox (or launching arrow or not)                
                 if pg.Rect.colliderect(self.player.rects['hitbox'], monster.rect_attack) and monster.state == ATTACKING and self.player.state['active'] != STOMPING:
                     if monster.data.attack_instant_damage:  
-                        self.player.hit(monster.data.attack_damage, monster.turned, self.terrain_sprites)  # melee hit
+                        self.player.hit(monster.data.attack_damage, monster.turned, self.terrain)  # melee hit
                         self.particles_blood(self.player.rects['hitbox'].centerx, self.player.rects['hitbox'].centery, RED, monster.turned)  # add blood particles when player is hit
                     elif now - monster.last_arrow > monster.data.attack_delay:  # launching projectile 
-                        arrow = Projectile(monster.hitbox.centerx, monster.hitbox.centery-10, self.arrow_img, turned = monster.turned, scale = 3) 
                         # We only add the arrow once the bow animation is complete (and we know we're ATTACKING, so attack anim is active)
                         if monster.animation.on_last_frame:
-                            self.projectile_sprites.add(arrow)
+                            self.projectile_pool.get(self.projectile_sprites, monster.hitbox.centerx, monster.hitbox.centery-10, self.arrow_img, turned = monster.turned, scale = 3)
                             monster.last_arrow = now
 
 
@@ -400,47 +458,6 @@ class Level():
                     bottom_pos = (1 + row_index) * (TILE_SIZE_SCREEN)  # this helps anchor sprites that are odd sizes, where we have to check they are on the ground
             
 
-                    if type == 'pos_terrain':  
-                        """ Loading terrain tiles
-                            NOTE: there is really no limit to size - the program can accept any size of level,
-                        """
-
-                        tile_surface = self.terrain_tilesheet_list[int(val)]
-                        
-                        (x_size, y_size) = tile_surface.get_size()
-                        if not x_size == y_size == TILE_SIZE:
-                            logging.debug(f'Terrain tiles are of size {x_size}x{y_size}, but we have TILE_SIZE {TILE_SIZE} in settings')
-                        
-                        # Tile scaling - 1 is original size
-                        x_size = x_size * 2
-                        y_size = y_size * 2
-
-
-                        if int(val) in self.level_data['moving_horiz']:  # TODO: for now only accepts single tiles
-                            distance = 100
-                            sprite = MovingGameTile(x_size ,y_size,x,y, 3,  distance,tile_surface)  # Moving platform
-                        else:
-                            slope = 0
-                            slope_pos = None  # only used for multi-tile slopes where we need to know if it's the first or second tile
-                            slope_tiles = self.level_data['sloping_tiles']
-                            if int(val) in slope_tiles['down_in_1']:
-                                slope = 1
-                            if int(val) in slope_tiles['down_in_2']:
-                                slope = 2
-                                slope_pos = -1 # default, this tile is the left in the pair
-                                if int(row[col_index-1]) in slope_tiles['down_in_2']:  # check if previous tile was first or if this tile is
-                                    slope_pos = 1  # nope, there was another to our left
-                            if int(val) in slope_tiles['up_in_1']:
-                                slope = -1
-                            if int(val) in slope_tiles['up_in_2']:
-                                slope = -2
-                                slope_pos = 1 # default, this tile is the right in the pair
-                                if int(row[col_index+1]) in slope_tiles['up_in_2']:  # check if if tile to the right is same type, then this is the first
-                                    slope_pos = -1
-                            sprite = GameTile(x_size,y_size,x,y,tile_surface, slope=slope, slope_pos=slope_pos)  # Normal static terrain tiles
-                        if int(val) not in self.level_data['solid_tiles']:  # Water mostly
-                            sprite.solid = False
-                        
                     if type == 'pos_decorations':
                         tile_surface = self.decorations_tile_list[int(val)]
                         (x_size, y_size) = tile_surface.get_size()
@@ -562,13 +579,12 @@ class Level():
 # --> Effect funtions 
     def particles_blood(self, x, y, color, turned) -> None:
         direction = -1 if turned is True else 1
-        for _ in range(50):   
-            self.particle_system.add({
-                'center': [x + random() * 30, y + random() * 30],
-                'velocity': [random() * 10 * direction , random() * -10],
-                'radius': random() * 5,
-                'color': color
-            })
+        for _ in range(self.blood_particles):   
+            self.particle_system.spawn(
+                x + rng_fx.random() * 30, y + rng_fx.random() * 30,  # center
+                rng_fx.random() * 10 * direction , rng_fx.random() * -10,  # velocity
+                rng_fx.random() * 5,  # radius
+                color)
                 
     def show_bubbles(self) -> None:
         msg_types = []
@@ -579,7 +595,42 @@ class Level():
                 msg_types.append(bubble.msg_type)
                 bubble.show()
 
+    def apply_quality(self) -> None:
+        """ Passes the settings of the current quality tier (see QualityGovernor) on to the effects, when it has changed """
+        tier = self.gs.quality.tier
+        if tier == self.quality_tier:
+            return
+        settings = self.gs.quality.settings
+        self.blood_particles = settings['blood_particles']
+        self.weather_effets.set_density(settings['weather_density'])
+        self.background.layers = settings['parallax_layers']
+        self.env_effects.spawn_rate = settings['env_spawn_rate']
+        self.quality_tier = tier
+
 # --> Main functions
+    def run_group(self, name: str, group: pg.sprite.Group, *update_args, draw: bool=True, cull: bool=False) -> None:
+        """ Updates one sprite group and queues it for drawing (see RenderQueue), timing both for the profiler
+            With cull, sprites far off screen only scroll (their scroll() method) instead of being updated and animated
+        """
+        profiler = self.gs.profiler
+        profiler.start(f'{name} update')
+        if cull:
+            update_area = self.render_queue.update_area
+            for sprite in group.sprites():
+                if update_area.colliderect(sprite.rect):
+                    sprite.update(*update_args)
+                else:
+                    sprite.scroll(*update_args)
+        else:
+            group.update(*update_args)
+        profiler.stop()
+        blits = 0
+        if draw:
+            profiler.start(f'{name} draw')
+            blits = self.render_queue.add_group(group)
+            profiler.stop()
+        profiler.count(name, len(group), blits)
+
     def player_setup(self) -> Player:
         player = Player(self.lvl_entry[0], self.lvl_entry[1], self.screen, self.audio, self.level_data, self.gs)
         logging.debug(f'Player spawned at ({self.lvl_entry[0]}, {self.lvl_entry[1]})')
@@ -591,91 +642,109 @@ class Level():
         """
 
         if self.first_run:
-            self.v_scroll = - (self.player.world_y_pos - 600)  # we scroll the "world", including the player, to move the "camera"
+            self.v_scroll = math.floor(- (self.player.world_y_pos - 600))  # we scroll the "world", including the player, to move the "camera"
+            # ^ whole pixels, so the terrain grid and the sprites scroll by exactly the same amount
             self.player.rects['player'].centery += self.v_scroll  # the player doesn't respond to self.v_scroll, so we need to update the vertical rect pos manually
             self.first_run = False
 
+        profiler = self.gs.profiler
+        self.apply_quality()
+
         # --> UPDATE BACKGROUND <---
+        profiler.start('background')
+        profiler.start('update')
         self.background.update(self.h_scroll)  # only scroll horizontally
+        profiler.stop()
+        profiler.start('draw')
         self.background.draw(self.screen)
-
-        # --> PULL MONSTERS FROM ALL-MONSTER SPRITE GROUP, TO NEARBY MONSTERS SPRITE GROUP
-        self.monsters_nearby = pg.sprite.Group()  # we empty every iteration
-        self.monsters_nearby = self.monsters_sprites  # TODO: for later. for now we implemented proximity checks in the Monster class
+        profiler.stop()
+        profiler.stop()
 
         # --> UPDATE ALL SPRITE GROUPS <---
 
         # terrain
-        self.terrain_sprites.update(self.h_scroll, self.v_scroll)
-        self.terrain_sprites.draw(self.screen)
-        #self.screen.blit(self.terrain_surface, (0,0))
-
-        # decorations  
-        self.decorations_sprites.update(self.h_scroll, self.v_scroll)
-        self.decorations_sprites.draw(self.screen)
-
-        # hazards  
-        self.hazards_sprites.update(self.h_scroll, self.v_scroll)
-        self.hazards_sprites.draw(self.screen)
-
-        # pickups
-        self.pickups_sprites.update(self.h_scroll, self.v_scroll)
-        self.pickups_sprites.draw(self.screen)
-
-        # drops
-        self.drops_sprites.update(self.h_scroll, self.v_scroll)
-        self.drops_sprites.draw(self.screen)
-
-        # projectiles
-        self.projectile_sprites.update(self.h_scroll, self.v_scroll, self.terrain_sprites)
-        self.projectile_sprites.draw(self.screen)
-
-        # spells
-        self.spell_sprites.update(self.h_scroll, self.v_scroll)
-        self.spell_sprites.draw(self.screen)
+        profiler.start('terrain')
+        profiler.start('terrain update')
+        self.terrain.update(self.h_scroll, self.v_scroll)
+        profiler.stop()
+        profiler.start('terrain draw')
+        blits = self.terrain.draw(self.render_queue)
+        profiler.stop()
+        profiler.count('terrain', len(self.terrain), blits)
+        self.run_group('decorations', self.decorations_sprites, self.h_scroll, self.v_scroll)
+        self.run_group('hazards', self.hazards_sprites, self.h_scroll, self.v_scroll, cull=True)
+        self.run_group('pickups', self.pickups_sprites, self.h_scroll, self.v_scroll, cull=True)
+        self.run_group('drops', self.drops_sprites, self.h_scroll, self.v_scroll, cull=True)
+        self.trigger_zones.scroll(self.h_scroll, self.v_scroll)
+        profiler.stop()
+
+        # projectiles and spells
+        profiler.start('monsters')
+        self.run_group('projectiles', self.projectile_sprites, self.h_scroll, self.v_scroll, self.terrain)
+        self.run_group('spells', self.spell_sprites, self.h_scroll, self.v_scroll)
+        profiler.stop()
 
         # triggered_objects 
-        self.triggered_objects_sprites.update(self.h_scroll, self.v_scroll)
-        self.triggered_objects_sprites.draw(self.screen)
-
-        # monsters 
-        self.monsters_nearby.update(self.h_scroll, self.v_scroll, self.collision_sprites, self.player)
-        self.monsters_nearby.draw(self.screen)
-
-        # stomp shadows
-        self.stomp_shadows.update(self.h_scroll, self.v_scroll)
-        self.stomp_shadows.draw(self.screen)
-
-        # stomp effect
-        self.stomp_effects.update(self.h_scroll, self.v_scroll)
-        self.stomp_effects.draw(self.screen)
-
-        # dust
-        self.effect_sprites.update(self.h_scroll, self.v_scroll)
-        self.effect_sprites.draw(self.screen)
-        
-        # info pop-ups
-        self.info_sprites.update(self.h_scroll, self.v_scroll)
-        self.info_sprites.draw(self.screen)
-
-        # entry and exit points
-        self.player_in_out_sprites.update(self.h_scroll, self.v_scroll)  
-        #self.player_in_out_sprites.draw(self.screen)  # normally we do not draw these, but good to have for debugging
+        profiler.start('terrain')
+        self.run_group('triggered objects', self.triggered_objects_sprites, self.h_scroll, self.v_scroll, cull=True)
+        profiler.stop()
+
+        # monsters - the scheduler picks the monsters near the screen (monsters_nearby), and updates those
+        profiler.start('monsters')
+        profiler.start('monsters update')
+        self.monster_scheduler.update(self.h_scroll, self.v_scroll, self.terrain, self.collision_sprites, self.player)
+        profiler.stop()
+        profiler.start('monsters draw')
+        blits = self.render_queue.add_trimmed(self.monsters_nearby)
+        profiler.stop()
+        profiler.count('monsters', len(self.monsters_sprites), blits)
+        profiler.stop()
+
+        profiler.start('effects')
+        self.run_group('stomp shadows', self.stomp_shadows, self.h_scroll, self.v_scroll)
+        self.run_group('stomp effects', self.stomp_effects, self.h_scroll, self.v_scroll)
+        self.run_group('dust', self.effect_sprites, self.h_scroll, self.v_scroll)
+        self.run_group('info pop-ups', self.info_sprites, self.h_scroll, self.v_scroll)
+
+        # entry and exit points - normally we do not draw these, but good to have for debugging
+        self.run_group('entry and exit', self.player_in_out_sprites, self.h_scroll, self.v_scroll, draw=False)
 
         # environmental effects
-        self.env_sprites.update(self.h_scroll, self.v_scroll)
-        self.env_sprites.draw(self.screen)
+        profiler.start('environment update')
+        self.env_effects.update(self.h_scroll, self.v_scroll)
+        profiler.stop()
+        profiler.start('environment draw')
+        blits = self.env_effects.draw(self.render_queue)
+        profiler.stop()
+        profiler.count('environment', len(self.env_effects), blits)
+        profiler.stop()
+
+        # everything queued so far, terrain to environment, in one go - the rest is drawn straight to the screen
+        profiler.start('render')
+        self.render_queue.flush()
+        profiler.stop()
+
+        profiler.start('effects')
 
         # particle system
+        profiler.start('particles update')
         self.particle_system.update(self.h_scroll, self.v_scroll)
+        profiler.stop()
+        profiler.start('particles draw')
         self.particle_system.draw(self.screen)
+        profiler.stop()
+        profiler.count('particles', len(self.particle_system.all_particles))  # drawn as rects, not blits
 
         # weather
+        profiler.start('weather')
         self.weather_effets.update_and_draw(self.h_scroll, self.v_scroll, self.screen)
+        profiler.stop()
+        profiler.stop()
 
         # player 
-        self.h_scroll, self.v_scroll = self.player.update(self.terrain_sprites)
-        self.player_sprites.draw(self.screen)
+        profiler.start('player')
+        self.h_scroll, self.v_scroll = self.player.update(self.terrain)
+        self.player.draw(self.screen)
 
         """ DEMO ZONE """
         # Testing player casting
@@ -685,6 +754,7 @@ class Level():
                 cast.draw(self.screen)
                 if cast.done:
                     self.player.cast_active.remove(cast)
+        profiler.stop()
    
         if DEBUG_HITBOXES:
             pg.draw.rect(self.screen, (255,255,255), self.player.rect, 4 )  # self.rect - WHITE
@@ -694,28 +764,33 @@ class Level():
                 pg.draw.rect(self.screen, (255, 0, 0), self.player.rects['attack'], 4 )  # attack rect - RED
             if self.player.collision_sprite.rect:
                 pg.draw.rect(self.screen, ('#e75480'), self.player.collision_sprite.rect, 2 )  # Collsion rect - PINK
-
-        # --> Check player condition and actions <--
-        self.check_player_attack()
-        self.check_player_stomp()
-        self.check_player_dust()
-        self.check_player_win()
-
-        # --> Check collisions <--
-        self.check_coll_player_hazard()
-        self.check_coll_player_projectile()
-        self.check_coll_player_spell()
-        self.check_coll_player_pickup()
-        self.check_coll_player_triggered_objects()
-        self.check_coll_player_drops()
-        self.check_coll_stomp_monster()  # we need this to be called before player/monster collision check
-        self.check_coll_player_monster()
+            for monster in self.monsters_nearby:  # after the flush, or the queued terrain and monsters would cover them
+                pg.draw.rect(self.screen, (255,255,255), monster.rect, 4 )  # self.rect - WHITE
+                pg.draw.rect(self.screen, (128,128,128), monster.hitbox, 2 )  # Hitbox rect (grey)
+
+        # --> Check player condition and actions, and collisions <--
+        profiler.start('collision')
+        # find_contacts() runs after check_player_stomp(), which can start a stomp blast, and before the checks using the contacts
+        for check in (self.check_player_stomp, self.find_contacts, self.check_player_attack, self.check_player_dust,
+                      self.check_coll_player_hazard, self.check_coll_player_projectile, self.check_coll_player_spell, self.check_triggers,
+                      self.check_coll_stomp_monster,  # we need this to be called before player/monster collision check
+                      self.check_coll_player_monster):
+            profiler.start(check.__name__)
+            check()
+            profiler.stop()
+        profiler.stop()
 
         # --> Check monster condition and actions <--
+        profiler.start('monsters')
+        profiler.start('check_monsters')
         self.check_monsters()  # this check mob detection + attack as well as player attack against all mobs
+        profiler.stop()
 
         # --> Check if we're in the arena and player has requested monster spawns
         self.check_arena_spawns() 
+        profiler.stop()
         
         # --> Check effects and particle system <--
+        profiler.start('effects')
         self.show_bubbles()
+        profiler.stop()
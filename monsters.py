@@ -1,10 +1,14 @@
-import random
 import pygame as pg
 import logging
-import copy
 
 from game_data.settings import *
 from game_data.monster_data import MonsterData
+from game_clock import game_clock
+from game_random import game_random
+from spatial import SpatialGrid
+from animation import flip_image, tinted_image
+
+rng = game_random.stream('monsters')
 
 
 class Monster(pg.sprite.Sprite):
@@ -19,11 +23,9 @@ class Monster(pg.sprite.Sprite):
 
         # Setting up animations
         from game_data.animation_data import anim
-        self.animations = {
-            'walk': copy.copy(anim[monster_type]['walk']),
-            'attack': copy.copy(anim[monster_type]['attack']),
-            'death': copy.copy(anim[monster_type]['death']),
-            'cast': copy.copy(anim[monster_type]['cast'])
+        self.animations = {  # our own place in each animation, the frames are shared by all monsters of the type (not all can cast)
+            name: anim[monster_type][name].copy() if anim[monster_type][name] else None
+            for name in ('walk', 'attack', 'death', 'cast')
         }
 
         self.cast_player_pos = ()
@@ -32,6 +34,7 @@ class Monster(pg.sprite.Sprite):
         self.animation.active = True
 
         self.image = self.animations['walk'].get_image()
+        self.trimmed = self.animations['walk'].get_trimmed()  # (image, offset from rect.topleft) that we draw, see RenderQueue.add_trimmed()
         self.width = self.animations['walk'].ss.x_dim * self.animations['walk'].ss.scale
         self.height = self.animations['walk'].ss.y_dim * self.animations['walk'].ss.scale
 
@@ -99,14 +102,13 @@ class Monster(pg.sprite.Sprite):
             else:
                 self.rect_attack = pg.Rect(x , y, self.data.attack_range, height) 
 
-        pg.draw.rect(self.screen, (255,255,255), self.rect, 4 )  # self.rect - WHITE
-        pg.draw.rect(self.screen, (128,128,128), self.hitbox, 2 )  # Hitbox rect (grey)
-
-    def _check_platform_collision(self, dx, dy, obstacle_sprite_group) -> None:
+    def _check_platform_collision(self, dx, dy, terrain, obstacle_sprite_group) -> None:
          #
         # Checking platform collision to prevent falling and to turn when either at end of platform or hitting a solid tile
         #
-        all_obstacles = obstacle_sprite_group.sprites()
+        # Only what touches the rects we check below matters: below us (dy is 0 once we land), and down to the left and right
+        area = self.hitbox.move(0, dy - 2).unionall([self.hitbox.move(0, -2), self.hitbox.move(-self.hitbox.width, 40), self.hitbox.move(self.hitbox.width, 40)])
+        all_obstacles = terrain.near(area) + [obstacle for obstacle in obstacle_sprite_group if obstacle.rect.colliderect(area)]
         for obstacle in all_obstacles:
             if obstacle.solid is True:
                 # collision in the y direction only, using a collision rect indicating _next_ position (y + dy)
@@ -166,7 +168,7 @@ class Monster(pg.sprite.Sprite):
                 # Random transitions from ATTACKING to CASTING
                 for attack in self.data.boss_attacks:
                     # TODO: fix self.vel_y increasing print(self.vel_y)
-                    if attack['prob'] > random.random() and not player.vel_y:  # Random roll, if player not in the air
+                    if attack['prob'] > rng.random() and not player.vel_y:  # Random roll, if player not in the air
                         self.state_change(CASTING, attack_type=attack['name'], player_pos=(player.rect.centerx, player.rect.bottom))
                         dx = 0  # we stop to cast
                     else:
@@ -178,7 +180,7 @@ class Monster(pg.sprite.Sprite):
                         if self.data.attack_jumper \
                             and player_above_mob < 20 \
                             and self.vel_y == 0 \
-                            and random.random()  < 0.01:  # hardcoded jump probability
+                            and rng.random()  < 0.01:  # hardcoded jump probability
                                 self.vel_y = -10
 
             elif self.state == CASTING:
@@ -188,7 +190,7 @@ class Monster(pg.sprite.Sprite):
                     dx = self.data.speed_walking  #  we start at walking speed
 
                     # We throw in random changes in direction, different by mod type
-                    if self.data.random_turns / 100  > random.random():
+                    if self.data.random_turns / 100  > rng.random():
                         dx *= -1
                         self.data.direction *= -1
                         self.turned = not self.turned
@@ -204,11 +206,11 @@ class Monster(pg.sprite.Sprite):
 
             elif self.state == STUNNED:
                 # Typically only as a result of a successful player attack
-                #self.stun_start = pg.time.get_ticks()
+                #self.stun_start = game_clock.get_ticks()
                 self.animation.active = False  #  monster is frozen for the duration
                 self.rect_attack = pg.Rect(0,0,0,0)  # not attacking for the duration
                 self.rect_detect = pg.Rect(0,0,0,0)  # not detecting for the duration
-                if pg.time.get_ticks() - self.stun_start > self.data.stun_time:
+                if game_clock.get_ticks() - self.stun_start > self.data.stun_time:
                     self.invulnerable=False
                     self.state_change(ATTACKING)
 
@@ -231,7 +233,7 @@ class Monster(pg.sprite.Sprite):
                     self.animation = self.animations['attack']
                     self.animation.active = True
 
-                    self.last_attack = pg.time.get_ticks()  # recording time of last attack
+                    self.last_attack = game_clock.get_ticks()  # recording time of last attack
 
                     self.data.sound_attack.play()
 
@@ -253,7 +255,7 @@ class Monster(pg.sprite.Sprite):
             elif new_state == STUNNED:
                 # Typically only as a result of a successful player attack
                 self.data.sound_hit.play()
-                self.stun_start = pg.time.get_ticks()
+                self.stun_start = game_clock.get_ticks()
                 self.invulnerable = True
                 self.die_after_stun = bool(deadly)
 
@@ -292,13 +294,8 @@ class Monster(pg.sprite.Sprite):
             new_rect.center = self.rect.center
             self.rect = new_rect
 
-    def update(self, h_scroll, v_scroll, obstacle_sprite_group, player) -> None:
- 
-        # We only update postiontion and velocities of monsters who are on-screen (with some margin)      
-        on_screen_x = player.rects["player"].centerx - SCREEN_WIDTH < self.rect.centerx < player.rects["player"].centerx + SCREEN_WIDTH
-        on_screen_y = player.rects["player"].centery - SCREEN_HEIGHT < self.rect.centery < player.rects["player"].centery + SCREEN_HEIGHT
-        on_screen = on_screen_x * on_screen_y
-            
+    def update(self, h_scroll, v_scroll, terrain, obstacle_sprite_group, player) -> None:
+        # Only monsters near the screen get updated, see MonsterScheduler
         dx = self.vel_x
         dy = self.vel_y  # Newton would be proud!
 
@@ -322,14 +319,14 @@ class Monster(pg.sprite.Sprite):
                 if self.data.attack_jumper \
                     and player_above_mob < 0 \
                         and self.vel_y == 0 \
-                        and random.random()  < 0.01:  # hardcoded jump probability
+                        and rng.random()  < 0.01:  # hardcoded jump probability
                         self.vel_y = -10
 
             if self.state == WALKING:
                 dx = self.data.speed_walking  #  we start at walking speed
 
                 # We throw in random changes in direction, different by mod type, as long as we're on the ground
-                if self.data.random_turns / 100  > random.random() and self.vel_y == 0:
+                if self.data.random_turns / 100  > rng.random() and self.vel_y == 0:
                     dx *= -1
                     self.data.direction *= -1
                     self.turned = not self.turned
@@ -341,7 +338,7 @@ class Monster(pg.sprite.Sprite):
                 dx = self.vel_x
 
                 if not self.die_after_stun: 
-                    now = pg.time.get_ticks()
+                    now = game_clock.get_ticks()
                     if now - self.stun_start > self.data.stun_time:
                         self.vel_x = 0
                         self.invulnerable = False
@@ -355,21 +352,17 @@ class Monster(pg.sprite.Sprite):
         self.rect.x += h_scroll
         self.rect.y += v_scroll
 
-        if on_screen:
-            # we compensate for gravity
-            self.vel_y += GRAVITY  # gravity component gets added to the vel_y, which we add to dy at the top
-            
-           
+        # we compensate for gravity
+        self.vel_y += GRAVITY  # gravity component gets added to the vel_y, which we add to dy at the top
 
-            # Checking detection, hitbox and attack rects as well as platform rects for collision
-        
-            self.create_rects()
-            self._check_platform_collision(dx, dy, obstacle_sprite_group)
-            dy += self.vel_y  # TODO: supposed to help jumping for bosses, but doesn't work
+        # Checking detection, hitbox and attack rects as well as platform rects for collision
+        self.create_rects()
+        self._check_platform_collision(dx, dy, terrain, obstacle_sprite_group)
+        dy += self.vel_y  # TODO: supposed to help jumping for bosses, but doesn't work
 
-            # Update rectangle position
-            self.rect.x += dx * self.data.direction
-            self.rect.y += dy 
+        # Update rectangle position
+        self.rect.x += dx * self.data.direction
+        self.rect.y += dy 
 
         if self.state in (DEAD, DYING):
             self.rect_attack = None
@@ -382,7 +375,7 @@ class Monster(pg.sprite.Sprite):
 
 
         # Updating the ready_to_attack flag 
-        now = pg.time.get_ticks()
+        now = game_clock.get_ticks()
         if now - self.last_attack > self.data.attack_delay:
             self.ready_to_attack = True
         else:
@@ -391,20 +384,111 @@ class Monster(pg.sprite.Sprite):
 
         # Get the correct image for the SpriteGroup.update()
         if self.state == CASTING:
-            self.image = self.animations['cast'].get_image().convert_alpha()
-            self.image = self.animations['cast'].get_image(repeat_delay = self.data.cast_delay)
+            animation = self.animations['cast']
+            self.image = animation.get_image()
+            self.image = animation.get_image(repeat_delay = self.data.cast_delay)
         elif self.state == ATTACKING:
             # If we have a diffent size attack sprites, we need to take scale into account
-            self.image = self.animations['attack'].get_image(repeat_delay = self.data.attack_delay).convert_alpha()
+            animation = self.animations['attack']
+            self.image = animation.get_image(repeat_delay = self.data.attack_delay)
         elif self.state in (WALKING, STUNNED, DYING, DEAD):
-            self.image = self.animation.get_image()
+            animation = self.animation
+            self.image = animation.get_image()
         else:
             logging.error(f'Monster state {self.state} unknown, aborting...')
             exit(1)
                 
-        self.image = pg.transform.flip(self.image, self.turned, False)        
+        self.image = flip_image(self.image, self.turned)
+        self.trimmed = animation.get_trimmed(self.turned)
+        if self.state == STUNNED:  # a flash when we get hit, then frozen for the rest of the stun
+            tint = 'hit' if game_clock.get_ticks() - self.stun_start < HIT_FLASH_TIME else 'frozen'
+            self.trimmed = (tinted_image(self.trimmed[0], tint), self.trimmed[1])
+
+
+class MonsterScheduler:
+    """ Decides which monsters are updated each frame
+
+        Monsters near the screen (MONSTER_ACTIVE_MARGIN) are active: updated every frame, drawn, and the only ones
+        the level checks for attacks, stomps and player detection. A bit further out (MONSTER_REDUCED_MARGIN) they
+        are updated every MONSTER_REDUCED_RATE frames, and beyond that they sleep.
+
+        Monsters are found through a spatial grid in world coordinates, so sleeping monsters cost nothing per frame.
+        A monster only sees the scroll when it's updated, so we keep track of the scrolling it has missed and
+        hand it all over at its next update.
+    """
+    def __init__(self, monsters: pg.sprite.Group) -> None:
+        self.monsters = monsters  # all monsters in the level
+        self.active = pg.sprite.Group()  # updated every frame (Level.monsters_nearby)
+        self.reduced = []  # updated every MONSTER_REDUCED_RATE frames
+        self.grid = SpatialGrid(MONSTER_GRID_CELL)
+        self.scroll_x = 0  # total scroll so far: screen position = world position + scroll
+        self.scroll_y = 0
+        self.scroll_seen = {}  # monster: (scroll_x, scroll_y) at its last update
+        self.order = {}  # monster: number in order of adding, so monsters always update in the same order
+        self.frame = 0
+
+        for monster in monsters:
+            self._track(monster)
+
+    def add(self, monster: Monster) -> None:
+        """ Adds a monster created during the level (arena spawns) """
+        self.monsters.add(monster)
+        self._track(monster)
+
+    def _track(self, monster: Monster) -> None:
+        self.scroll_seen[monster] = (self.scroll_x, self.scroll_y)
+        self.order[monster] = len(self.order)
+        self.grid.insert(monster, self._world_rect(monster))
+
+    def _forget(self, monster: Monster) -> None:
+        self.grid.remove(monster)
+        del self.scroll_seen[monster]
+
+    def _world_rect(self, monster: Monster) -> pg.Rect:
+        seen_x, seen_y = self.scroll_seen[monster]
+        return monster.rect.move(-seen_x, -seen_y)
+
+    def _update_monster(self, monster: Monster, terrain, obstacle_sprite_group, player) -> None:
+        seen_x, seen_y = self.scroll_seen[monster]
+        monster.update(self.scroll_x - seen_x, self.scroll_y - seen_y, terrain, obstacle_sprite_group, player)
+        self.scroll_seen[monster] = (self.scroll_x, self.scroll_y)
+        self.grid.move(monster, self._world_rect(monster))
+
+    def update(self, h_scroll, v_scroll, terrain, obstacle_sprite_group, player) -> None:
+        self.scroll_x += h_scroll
+        self.scroll_y += v_scroll
+        self.frame += 1
+
+        # The screen and the zones around it, in world coordinates
+        screen = pg.Rect(-self.scroll_x, -self.scroll_y, SCREEN_WIDTH, SCREEN_HEIGHT)
+        active_zone = screen.inflate(MONSTER_ACTIVE_MARGIN[0] * 2, MONSTER_ACTIVE_MARGIN[1] * 2)
+        reduced_zone = screen.inflate(MONSTER_REDUCED_MARGIN[0] * 2, MONSTER_REDUCED_MARGIN[1] * 2)
+
+        active = []
+        self.reduced = []
+        for monster in sorted(self.grid.query(reduced_zone), key=self.order.get):
+            if not monster.alive():  # removed from the level
+                self._forget(monster)
+                continue
+            center = self._world_rect(monster).center
+            if active_zone.collidepoint(center):
+                active.append(monster)
+            elif reduced_zone.collidepoint(center):
+                self.reduced.append(monster)
+
+        self.active.empty()
+        self.active.add(active)
+
+        for monster in active:
+            self._update_monster(monster, terrain, obstacle_sprite_group, player)
+        for monster in self.reduced:
+            if (self.frame + self.order[monster]) % MONSTER_REDUCED_RATE == 0:  # spread out over the frames
+                self._update_monster(monster, terrain, obstacle_sprite_group, player)
+
 
 class Projectile(pg.sprite.Sprite):
+    images = {}  # scaled and flipped images with their masks, shared by all projectiles - (image, scale, turned): (image, mask)
+
     def __init__(self,x, y, image, turned, scale = 1) -> None:
         """
         The Projector class constructor - note that x and y is only for initialization,
@@ -412,15 +496,24 @@ class Projectile(pg.sprite.Sprite):
         NOTE: no animation - one image only!
         """
         super().__init__()
-        self.image = pg.transform.scale(image, (image.get_width() * scale, image.get_height() * scale))
+        self.reset(x, y, image, turned, scale)
+
+    def reset(self, x, y, image, turned, scale = 1) -> None:
+        # Sets the projectile up as new - also used to reuse killed projectiles (see SpritePool)
+        key = (image, scale, turned)
+        if key not in Projectile.images:
+            scaled = pg.transform.scale(image, (image.get_width() * scale, image.get_height() * scale))
+            scaled = pg.transform.flip(scaled.convert_alpha(), turned, False)  # facing doesn't change in flight
+            Projectile.images[key] = (scaled, pg.mask.from_surface(scaled))  # mask for pixel accurate hits, see mask_hits_rect()
+        self.image, self.mask = Projectile.images[key]
 
         self.speed = 10
-        self.width = image.get_width()
-        self.height = image.get_height()
+        self.width = self.image.get_width()  # the rect covers the whole arrow as drawn
+        self.height = self.image.get_height()
         self.rect = pg.Rect(x, y, self.width, self.height)
         self.turned = turned
         
-    def update(self, h_scroll, v_scroll, platforms_sprite_group) -> None:
+    def update(self, h_scroll, v_scroll, terrain) -> None:
         
         # we set start speeds for x and y
         dx = self.speed
@@ -438,11 +531,8 @@ class Projectile(pg.sprite.Sprite):
         self.rect.y += dy 
 
         # Collision with platform
-        if pg.sprite.spritecollideany(self, platforms_sprite_group):
+        if terrain.collide(self.rect):
             self.kill()
-        
-        # Ready for super.draw()
-        self.image = pg.transform.flip( self.image.convert_alpha(), self.turned, False)
 
 class Spell(pg.sprite.Sprite):
     def __init__(self, x, y, anim, turned, scale = 1) -> None:
@@ -452,12 +542,16 @@ class Spell(pg.sprite.Sprite):
         NOTE: Animation, but only _one_ animation cycle
         """
         super().__init__()
+        self.reset(x, y, anim, turned, scale)
+
+    def reset(self, x, y, anim, turned, scale = 1) -> None:
+        # Sets the spell up as new - also used to reuse killed spells (see SpritePool)
         self.anim = anim
         self.anim.active = True
         self.anim.counter = 0
         image = anim.get_image()
 
-        self.image = pg.transform.scale(image, (image.get_width() * scale, image.get_height() * scale))
+        self.image = image if scale == 1 else pg.transform.scale(image, (image.get_width() * scale, image.get_height() * scale))
 
         self.width = image.get_width()
         self.height = image.get_height()
@@ -465,6 +559,11 @@ class Spell(pg.sprite.Sprite):
         self.turned = turned
 
         self.anim.first_done = False
+
+    @property
+    def mask(self) -> pg.mask.Mask:
+        # Collision mask of the frame on show, made once per animation frame and facing
+        return self.anim.get_mask(self.turned)
         
     def update(self, h_scroll, v_scroll) -> None:
         self.rect.x += h_scroll
@@ -472,10 +571,9 @@ class Spell(pg.sprite.Sprite):
 
         # Done with one cycle, as spell do not repeat (yet!)
         if self.anim.first_done:
-            self.currently_casting = False
             self.kill()
 
-        self.image = pg.transform.flip( self.anim.get_image().convert_alpha(), self.turned, False)
+        self.image = flip_image(self.anim.get_image(), self.turned)
 
 class Drop(pg.sprite.Sprite):
     def __init__(self, x, y, anim, turned= False, scale = 1, drop_type=None) -> None:
@@ -484,6 +582,10 @@ class Drop(pg.sprite.Sprite):
         NOTE: continious animation
         """
         super().__init__()
+        self.reset(x, y, anim, turned, scale, drop_type)
+
+    def reset(self, x, y, anim, turned= False, scale = 1, drop_type=None) -> None:
+        # Sets the drop up as new - also used to reuse killed drops (see SpritePool)
         self.scale = scale
         self.drop_type = drop_type  # key, health potion etc.
         self.anim = anim
@@ -502,4 +604,9 @@ class Drop(pg.sprite.Sprite):
         self.rect.x += h_scroll # we compensate for h_scrolling
         self.rect.y += v_scroll # we compensate for h_scrolling
 
-        self.image = pg.transform.flip( self.anim.get_image().convert_alpha(), self.turned, False)         
+        self.image = flip_image(self.anim.get_image(), self.turned)         
+
+    def scroll(self, h_scroll, v_scroll) -> None:
+        # Only moves along with the screen, for drops too far off screen to be worth animating (see Level.run_group())
+        self.rect.x += h_scroll
+        self.rect.y += v_scroll
@@ -2,13 +2,16 @@ import pygame as pg
 from pygame.locals import *
 
 import sys
+import atexit
 import logging
 
 from game_data.settings import *
 from game_world import GameState, Game
+from replay import InputRecorder
+from profiler import ProfilerOverlay
+from telemetry import TelemetryRecorder
 
 
-FPS = 60
 logging.basicConfig(level=logging.DEBUG)
 
 
@@ -20,6 +23,13 @@ if len(sys.argv):
     if '--no-sound' in sys.argv:
         SOUNDS_ON = False
         logging.debug('Sound effects are OFF')
+    recorder = None
+    if '--record' in sys.argv:  # --record <file> : records the last level played, for replay in headless.py
+        recorder = InputRecorder(sys.argv[sys.argv.index('--record') + 1])
+        atexit.register(recorder.save)  # the game can exit from several places
+    telemetry_path = None
+    if '--telemetry' in sys.argv:  # --telemetry <file> : records frame times, stage timings and counts, see telemetry.py
+        telemetry_path = sys.argv[sys.argv.index('--telemetry') + 1]
 
 # pg setup
 # Initializing
@@ -57,12 +67,20 @@ screen = pg.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
 clock = pg.time.Clock()
 
 game = Game(gs, screen)  # Here we pass the GameState instance to game, which will pass it to Level, which will pass it to Player
+game.recorder = recorder
+profiler_overlay = ProfilerOverlay(screen, gs.profiler)
+telemetry = None
+if telemetry_path:
+    telemetry = TelemetryRecorder(telemetry_path, gs.profiler)
+    atexit.register(telemetry.close)
 
 motion = [0, 0]
 previous_state = gs.game_state
 
 font = pg.font.Font(None, 36)
 
+gs.clock.reset()  # game time starts now, not when pygame was initialized
+
 while True:
     for event in pg.event.get():
         if event.type == pg.QUIT:
@@ -78,6 +96,8 @@ while True:
                 case pg.K_UP: gs.user_input['up'] = True
                 case pg.K_DOWN: gs.user_input['down'] = True
                 case pg.K_SPACE: gs.user_input['attack'] = True
+                case pg.K_p: gs.clock.toggle_pause()
+                case pg.K_F3: profiler_overlay.toggle()
 
             # Additionally, if we're in the arena we have additional shortcuts
             if gs.level_current == 0:
@@ -122,7 +142,10 @@ while True:
             # print(event)
             pass
 
-    if gs.game_state == GS_PLAYING:
+    playing = gs.game_state == GS_PLAYING and not gs.clock.paused
+    if playing:
+        if recorder:
+            recorder.record_input(gs)
         game.run()
 
     if gs.game_state == GS_GAME_OVER:
@@ -149,8 +172,16 @@ while True:
         fps_text = font.render(f'FPS: {clock.get_fps():.2f}', True, (255, 255, 0))
         screen.blit(fps_text, (10, 100))
 
+    if profiler_overlay.visible:
+        profiler_overlay.draw()
+
     #_screen.blit(pg.transform.scale(screen, (width, height)), (0, 0))
     _screen.blit(screen, (0, 0))
 
     pg.display.update()
     clock.tick(FPS)
+    gs.clock.update()  # game time follows the real frame time (scaled/paused as needed)
+    if playing and recorder:
+        recorder.record_time(gs.clock)
+    if playing and telemetry:
+        telemetry.record(gs)
@@ -3,6 +3,8 @@ import logging
 
 from game_data.settings import *
 from decor_and_effects import ExpandingCircle, SpeedLines
+from tile_grid import TileGrid
+from animation import tinted_image
 
 
 # Player class
@@ -49,6 +51,9 @@ class Player(pg.sprite.Sprite):
         
         self.animation = self.animations['idle']  # Idle by default
         self.image = self.animation.get_image()
+        self.image_offset = (0, 0)  # where image goes in rects['player'], see get_anim_image()
+        self.tint = None  # hit flashes, see _flash()
+        self.tint_start = 0
         self.stomp_trigger = False
         self.stomp_trigger_lock = False  # we lock it after trigger to avoid duplicate triggers
         self.stomp_start_timer = 0  # we freeze for a second after a stomp (invulnerable)
@@ -115,7 +120,7 @@ class Player(pg.sprite.Sprite):
         self.collision_sprite.rect.centerx = self.hitbox_sprite.rect.centerx  # aligning center
         
         # Checking vertical collision with terrain (falling), taking slope into account
-        platform = pg.sprite.spritecollideany(self.collision_sprite, platforms)
+        platform = platforms.collide(self.collision_sprite.rect)
         if platform and platform.solid is True:  # player has collided with a solid platform
             if DEBUG_HITBOXES:
                 pg.draw.rect(self.screen, (128,128,255), platform.rect, 4 )  # self.rect - LIGHT BLUE
@@ -131,29 +136,8 @@ class Player(pg.sprite.Sprite):
             if platform.slope:
                 """ If we're on a sloped tile, we need to adjust the y position """
                 self.on_slope = True
-                h = TILE_SIZE_SCREEN
                 adjustment = 25  # this is critical, as if we go too low, we'll fall through at the bottom
-                x = self.rects['hitbox'].centerx - platform.rect.left
-                # Steep, 45 degree slopes
-                if platform.slope == 1:
-                    y = h - x
-                elif platform.slope == -1:
-                    y = x
-                # Shallower 22.5 degree slopes (always in pairs - 2 horis, 1 vert)
-                elif platform.slope == 2:  # Going DOWN and right
-                    if platform.slope_pos == -1:  # we're the left platform
-                        y = h - x/2
-                    if platform.slope_pos == 1: # we're on the right platform
-                        y = h/2 - x/2
-                elif platform.slope == -2:  # Going UP and right
-                    if platform.slope_pos == -1:  # we're the left platform
-                        y = x/2
-                    if platform.slope_pos == 1: # we're on the right platform
-                        y = h/2 + x/2
-                else:
-                    logging.error(f'Invalid value {platform.slope=}')
-                
-                y = round(y)  # only integers for coordinate positions
+                y = platform.ground_height(self.rects['hitbox'].centerx - platform.rect.left)  # precomputed for every tile, see slope_profiles()
 
 
                 dy = platform.rect.bottom - self.rects['hitbox'].bottom - y - adjustment  # from the bottom, as we add y which starts at platform.rect.bottom
@@ -177,7 +161,7 @@ class Player(pg.sprite.Sprite):
             if dx < 0:  # going left
                 self.side_collision_sprite.rect.centerx = self.hitbox_sprite.rect.centerx - 10
 
-            platform = pg.sprite.spritecollideany(self.side_collision_sprite, platforms)
+            platform = platforms.collide(self.side_collision_sprite.rect)
             if platform and platform.solid is True and not platform.slope:  # player has collided with a solid platform and is not walking a slope
                 dx = 0
            
@@ -187,13 +171,10 @@ class Player(pg.sprite.Sprite):
         return dx, dy
 
 
-    def _flash(self) -> None:   # TODO: nothing works as a new image with be generated by move() before the screen is updated
-        coloured_image = pg.Surface(self.image.get_size())
-        coloured_image.fill(RED)
-        
-        final_image = self.image.copy()
-        final_image.blit(coloured_image, (0, 0), special_flags = pg.BLEND_MULT)
-        self.image = final_image
+    def _flash(self, tint: str='hit') -> None:
+        # Shows the player tinted for a moment (see get_anim_image()), the tinted frames are cached by tinted_image()
+        self.tint = tint
+        self.tint_start = self.gs.clock.get_ticks()
     
 
     def _state_engine(self) -> None:
@@ -237,7 +218,7 @@ class Player(pg.sprite.Sprite):
 
                 # If we were stomping and have landed, we trigger effect right away, but we stay in state for one second
                 if self.state['active'] == STOMPING and self.on_ground:
-                    now = pg.time.get_ticks()
+                    now = self.gs.clock.get_ticks()
                     if now - self.stomp_start_timer > 500 and self.stomp_trigger_lock is True:
                         self.state['active'] = IDLE
                         self.animation = self.animations['idle']
@@ -330,10 +311,10 @@ class Player(pg.sprite.Sprite):
             if self.state['next'] == DEAD:
                 self.state['active'] = DEAD
                 logging.debug('--- DEAD ---')
-                pg.time.wait(3000)  # we freeze the game to look at your corpse for a moment
+                self.gs.clock.wait(3000)  # we freeze the game to look at your corpse for a moment
 
              
-    def actions(self, platforms: pg.sprite.Group ) -> tuple:
+    def actions(self, platforms: TileGrid ) -> tuple:
         """ Movement as a result of keypresses as well as gravity and collision """
         dx = 0
         dy = 0
@@ -344,7 +325,7 @@ class Player(pg.sprite.Sprite):
         # If we've been hit, we're invincible - check if it's time to reset
         if self.gs.player_invincible \
             and self.state['active'] not in (DYING, DEAD) \
-            and pg.time.get_ticks() - self.last_damage > self.invincibility_duration:
+            and self.gs.clock.get_ticks() - self.last_damage > self.invincibility_duration:
                 self.gs.player_invincible = False
 
         # Making sure stomp is limited
@@ -468,19 +449,22 @@ class Player(pg.sprite.Sprite):
 
     def get_anim_image(self) -> None:
         """ 
-        Update the image of self, which is called by SpriteGroup.draw() method 
+        Update the image of self, and where it goes in the player rect - drawn by draw()
         """
         # Once animation points to the correct state animation, we have our image
-        anim_frame = self.animation.get_image().convert_alpha()
-        anim_frame = pg.transform.flip( anim_frame, self.turned, False)
-        
-        self.image = pg.Surface((self.width, self.height)).convert_alpha()
-        self.image.fill((0, 0, 0, 0))
+        self.animation.get_image()  # moves the animation along
+        self.image, (trim_x, trim_y) = self.animation.get_trimmed(self.turned)  # only the visible part of the frame, already flipped
+        if self.tint and self.gs.clock.get_ticks() - self.tint_start < HIT_FLASH_TIME:
+            self.image = tinted_image(self.image, self.tint)
 
         x_adjustment = 25  # to center the player image in the sprite
         y_adjustment = 0
-        
-        self.image.blit(anim_frame, (x_adjustment, y_adjustment))
+
+        self.image_offset = (x_adjustment + trim_x, y_adjustment + trim_y)
+
+    def draw(self, surface: pg.Surface) -> None:
+        # The player rect is wider than the frames (see self.width), so we blit the frame straight to where it goes inside it
+        surface.blit(self.image, (self.rects['player'].x + self.image_offset[0], self.rects['player'].y + self.image_offset[1]))
 
     def get_input(self) -> None:
         """ Registering keypresses and triggering state changes """
@@ -509,7 +493,7 @@ class Player(pg.sprite.Sprite):
                 self.audio.player['stomp'].play()
 
             if self.gs.user_input['attack']:
-                now = pg.time.get_ticks()
+                now = self.gs.clock.get_ticks()
                 if now - self.last_attack > self.attack_delay:
                     self.state['next'] = ATTACKING
                     self.gs.user_input['attack'] = False  # we reset to prevent repeated attacks by holding down the attack key/button
@@ -517,7 +501,7 @@ class Player(pg.sprite.Sprite):
                     self.last_attack = now
 
             if self.gs.user_input['cast']:
-                now = pg.time.get_ticks()
+                now = self.gs.clock.get_ticks()
                 if now - self.last_cast > self.cast_delay:
                     self.state['next'] = CASTING
                     if not self.fx_attack_channel.get_busy():  # playing sound if not all channels busy
@@ -531,9 +515,10 @@ class Player(pg.sprite.Sprite):
 
     def hazard_damage(self, damage: int, hits_per_second:int=0) -> None:
         """ Player has been in contact with enviromnmental damage, gets damage once or frequency per second """
-        now = pg.time.get_ticks()
+        now = self.gs.clock.get_ticks()
         if now > self.last_env_damage + 1000 / hits_per_second:
             self.audio.player['hit'].play()
+            self._flash('damage')
             # Adjust health and bars
             self.gs.player_health -= damage
             self.gs.player_stomp_counter = 0  # reset stomp on hit
@@ -550,7 +535,7 @@ class Player(pg.sprite.Sprite):
         if self.gs.player_health > self.gs.player_health_max:
             self.gs.player_health = self.gs.player_health_max
 
-    def hit(self, damage: int, turned: bool, platforms: pg.sprite.Group) -> None:
+    def hit(self, damage: int, turned: bool, platforms: TileGrid) -> None:
         """ Player has been hit by mob or projectile, gets damage and bounces backs"""
         if not self.gs.player_invincible:  # we have half a sec of invincibility after damage to avoid repeat damage
             if damage:  # we also use hits without damage to bump the player
@@ -558,7 +543,7 @@ class Player(pg.sprite.Sprite):
                 self.audio.player['hit'].play()
                 self.gs.player_invincible = True  # we want 
                 self.gs.player_hit = True
-                self.last_damage = pg.time.get_ticks()  
+                self.last_damage = self.gs.clock.get_ticks()  
                 self.gs.player_stomp_counter = 0  # reset stomp on hit
                 # Adjust health and bars
                 self.gs.player_health -= damage
@@ -573,7 +558,7 @@ class Player(pg.sprite.Sprite):
 
                
 
-    def bounce(self, x: int, y: int, turned: bool, platforms: pg.sprite.Group) -> None:
+    def bounce(self, x: int, y: int, turned: bool, platforms: TileGrid) -> None:
         direction = -1 if turned else 1
 
         # Bounce back
@@ -587,10 +572,9 @@ class Player(pg.sprite.Sprite):
             self.bouncing = True
 
         # Prevent us getting bounced inside platforms
-        for platform in platforms:
-            if platform.rect.colliderect(self.rects['hitbox'].x + x_bounce, (self.rects['hitbox'].y + y_bounce), self.rects['hitbox'].width , self.rects['hitbox'].height):
-                x_bounce = 0
-                self.vel_x = 0
+        if platforms.collide(pg.Rect(self.rects['hitbox'].x + x_bounce, (self.rects['hitbox'].y + y_bounce), self.rects['hitbox'].width , self.rects['hitbox'].height)):
+            x_bounce = 0
+            self.vel_x = 0
 
 
     def update(self, platforms) -> tuple:
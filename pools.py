@@ -0,0 +1,36 @@
+"""
+SpritePool (class)      : hands out sprites of one class, reusing killed ones instead of making new ones
+"""
+
+import pygame as pg
+
+
+class SpritePool:
+    """ Reuses sprites that have been killed (are in no sprite groups any more), for things that are made and
+        killed all the time in a fight - arrows, spells, drops, landing dust.
+
+        Pooled classes have a reset() taking the same arguments as their constructor, which sets the
+        sprite up just like a new one. get() puts the sprite in its group right away, as a sprite in no
+        group counts as free. A killed sprite can be handed out again, so don't hold on to sprites after
+        killing them.
+    """
+    def __init__(self, sprite_class: type) -> None:
+        self.sprite_class = sprite_class
+        self.sprites = []  # every sprite we've made
+        self.free = []  # killed sprites ready for reuse, collected when we run out
+
+    def __len__(self) -> int:
+        return len(self.sprites)
+
+    def get(self, group: pg.sprite.AbstractGroup, *args, **kwargs) -> pg.sprite.Sprite:
+        """ A killed sprite reset with the given arguments, or a new one if they're all in use - added to group """
+        if not self.free:
+            self.free = [sprite for sprite in self.sprites if not sprite.alive()]
+        if self.free:
+            sprite = self.free.pop()
+            sprite.reset(*args, **kwargs)
+        else:
+            sprite = self.sprite_class(*args, **kwargs)
+            self.sprites.append(sprite)
+        group.add(sprite)
+        return sprite
@@ -0,0 +1,194 @@
+"""
+FrameProfiler (class)   : times named stages of each frame (Level.run(), Game.run()) and keeps per-frame results
+ProfilerOverlay (class) : in-game overlay with average stage timings, sprite counts and a frame time graph
+percentiles (function)  : summary statistics for a list of timings
+"""
+
+import time
+from collections import deque
+
+import pygame as pg
+
+from game_data.settings import *
+
+
+class FrameProfiler:
+    """ Times the stages of a frame, for benchmarks and the frame profiler overlay
+
+        Stages can be nested, and are then named 'outer/inner'. When disabled, all calls return right away.
+        The profiler is enabled while anybody uses it (overlay, telemetry, benchmarks), see enable()/disable().
+        After end_frame(), last_frame holds {stage: ms} for the frame just finished, and last_counts holds
+        {name: (sprites, blits)} for the sprite groups counted in it. quality_tier is kept up to date by the
+        QualityGovernor (see quality.py), so timings can be read knowing which effects were turned down.
+    """
+    def __init__(self, recent_frames: int=PROFILER_RECENT_FRAMES) -> None:
+        self.enabled = False
+        self.users = set()  # who needs the profiler running
+        self.keep_history = False  # keep every frame in self.history (benchmarks)
+        self.history = []  # list of {stage: ms}, one per frame, the whole frame is under 'frame'
+        self.recent = deque(maxlen=recent_frames)  # the last few frames, for averages and the overlay graph
+        self.last_frame = {}
+        self.last_counts = {}
+        self.current = {}
+        self.counts = {}
+        self.stack = []  # (name, start time) of stages that have been started, but not stopped yet
+        self.frame_start = 0
+        self.quality_tier = 0  # 0 is full detail
+
+    def enable(self, user: str) -> None:
+        self.users.add(user)
+        self.enabled = True
+
+    def disable(self, user: str) -> None:
+        self.users.discard(user)
+        self.enabled = bool(self.users)
+
+    def start_frame(self) -> None:
+        if not self.enabled:
+            return
+        self.current = {}
+        self.counts = {}
+        self.stack = []
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self) -> None:
+        if not self.enabled:
+            return
+        self.current['frame'] = (time.perf_counter() - self.frame_start) * 1000
+        self.last_frame = self.current
+        self.last_counts = self.counts
+        self.recent.append(self.current)
+        if self.keep_history:
+            self.history.append(self.current)
+
+    def start(self, stage: str) -> None:
+        if not self.enabled:
+            return
+        if self.stack:
+            stage = f'{self.stack[-1][0]}/{stage}'
+        self.current.setdefault(stage, 0)  # so stages are listed in the order they start, outer before inner
+        self.stack.append((stage, time.perf_counter()))
+
+    def stop(self) -> None:
+        if not self.enabled:
+            return
+        stage, start = self.stack.pop()
+        self.current[stage] += (time.perf_counter() - start) * 1000
+
+    def count(self, name: str, sprites: int, blits: int=0) -> None:
+        """ Counts the sprites (or particles etc.) in a group, and how many of them were blitted this frame """
+        if not self.enabled:
+            return
+        old_sprites, old_blits = self.counts.get(name, (0, 0))
+        self.counts[name] = (old_sprites + sprites, old_blits + blits)
+
+    def averages(self) -> dict:
+        """ Average ms per frame of every stage over the recent frames - stages skipped in a frame count as 0 """
+        totals = {}
+        for frame in self.recent:
+            for stage, ms in frame.items():
+                totals[stage] = totals.get(stage, 0) + ms
+        frames = len(self.recent) or 1
+        return {stage: total / frames for stage, total in totals.items()}
+
+
+class ProfilerOverlay:
+    """ Shows the frame profiler on top of the game - toggled with F3 (see phflorg.py)
+
+        Lists the average time of each stage (and the parts inside it, indented), with sprite/blit counts
+        for sprite groups, and a graph of the recent frame times against the frame budget (1000 / FPS ms).
+        The text is only rebuilt every PROFILER_REFRESH ms, as rendering it every frame would cost more
+        than most of what it measures.
+    """
+    def __init__(self, screen: pg.Surface, profiler: FrameProfiler) -> None:
+        self.screen = screen
+        self.profiler = profiler
+        self.visible = False
+        self.font = pg.font.Font(None, 20)
+        self.line_height = self.font.get_linesize()
+        self.lines = []  # rendered text lines: [(x offset, surface), ...] per line
+        self.last_refresh = 0
+        self.budget = 1000 / FPS
+
+        self.x = SCREEN_WIDTH - PROFILER_WIDTH  # right side of the screen, away from the game panel
+        self.graph_rect = pg.Rect(self.x + 10, 10, PROFILER_RECENT_FRAMES * 2, 60)
+        self.background = pg.Surface((PROFILER_WIDTH, SCREEN_HEIGHT))
+        self.background.set_alpha(180)  # per-surface alpha, no per-pixel alpha needed
+
+        if SHOW_PROFILER:
+            self.toggle()
+
+    def toggle(self) -> None:
+        self.visible = not self.visible
+        if self.visible:
+            self.profiler.enable('overlay')
+        else:
+            self.profiler.disable('overlay')
+        self.profiler.recent.clear()
+        self.lines = []
+
+    def _refresh(self) -> None:
+        """ Renders the text lines from the current averages and counts, stages in the order they ran """
+        averages = self.profiler.averages()
+        counts = self.profiler.last_counts
+        frame = averages.pop('frame', 0)
+
+        # A stage can run more than once in a frame (terrain, monsters), so we keep the parts together under their stage
+        top_stages = [stage for stage in averages if '/' not in stage]
+        stages = sorted(averages, key=lambda stage: top_stages.index(stage.split('/')[0]))
+
+        self.lines = [[(0, self.font.render(f'frame {frame:.2f} ms ({frame / self.budget * 100:.0f}% of budget)', True, YELLOW)),
+                       (350, self.font.render(f'quality tier {self.profiler.quality_tier}', True, YELLOW))]]
+        for stage in stages:
+            depth = stage.count('/')
+            name = stage.rsplit('/', 1)[-1]
+            color = WHITE if depth == 0 else GRAY
+            line = [(depth * 12, self.font.render(name, True, color)), (290, self.font.render(f'{averages[stage]:.2f}', True, color))]
+
+            group = name.removesuffix(' draw')
+            if group == 'particles' and group in counts:
+                line.append((350, self.font.render(f'{counts[group][0]} particles', True, color)))
+            elif name.endswith(' draw') and group in counts:
+                sprites, blits = counts[group]
+                line.append((350, self.font.render(f'{sprites} spr / {blits} blits', True, color)))
+            self.lines.append(line)
+
+    def draw(self) -> None:
+        # Refreshing is real time, so the overlay keeps working while the game clock is paused
+        now = pg.time.get_ticks()
+        if now - self.last_refresh > PROFILER_REFRESH:
+            self._refresh()
+            self.last_refresh = now
+
+        self.screen.blit(self.background, (self.x, 0))
+
+        # Frame time graph, one bar per frame, the line is the frame budget
+        pg.draw.rect(self.screen, GRAY, self.graph_rect, 1)
+        scale = self.graph_rect.height / (self.budget * 2)  # the graph shows up to twice the budget
+        for n, frame in enumerate(self.profiler.recent):
+            height = min(frame['frame'] * scale, self.graph_rect.height)
+            color = GREEN if frame['frame'] <= self.budget else RED
+            x = self.graph_rect.x + n * 2
+            pg.draw.line(self.screen, color, (x, self.graph_rect.bottom - 1), (x, self.graph_rect.bottom - height))
+        budget_y = self.graph_rect.bottom - self.budget * scale
+        pg.draw.line(self.screen, YELLOW, (self.graph_rect.x, budget_y), (self.graph_rect.right - 1, budget_y))
+
+        y = self.graph_rect.bottom + 6
+        for line in self.lines:
+            for x, text in line:
+                self.screen.blit(text, (self.x + 10 + x, y))
+            y += self.line_height
+
+
+def percentiles(values: list) -> dict:
+    """ p50/p90/p95/p99, mean and max of a list of timings
+        Percentiles are nearest rank: the smallest value with at least p% of the values at or below it
+    """
+    if not values:
+        return {}
+    ordered = sorted(values)
+    count = len(ordered)
+    summary = {f'p{p}': ordered[max(-(-p * count // 100) - 1, 0)] for p in (50, 90, 95, 99)}  # rank ceil(p/100 * n), in integers
+    summary['mean'] = sum(ordered) / len(ordered)
+    summary['max'] = ordered[-1]
+    return summary
@@ -0,0 +1,71 @@
+"""
+QualityGovernor (class) : watches how long frames take, and turns effects down (and back up) a quality tier at a time
+"""
+
+import time
+import logging
+from collections import deque
+
+from game_data.settings import *
+
+
+class QualityGovernor:
+    """ Sheds effects when frames go over budget, and brings them back when there is room again
+
+        Game.run() calls start_frame() and end_frame() around the work of a frame (not the wait for the next one).
+        The game's deliberate freezes (GameClock.wait(), like the flash on a key pickup or the pause when the player
+        dies) are left out of the frame time, they aren't work and shouldn't cost any quality.
+        When the average over the last QUALITY_WINDOW frames is over QUALITY_FRAME_BUDGET, we go down a tier in
+        QUALITY_TIERS (fewer blood particles, less rain, fewer parallax layers, fewer leaves), and when it's under
+        QUALITY_HEADROOM of the budget, back up one. After a change we wait QUALITY_HOLD frames before the next one,
+        so the new tier gets to show what it does and one slow moment doesn't make the tiers flip back and forth.
+        Level.apply_quality() passes the settings of the tier on to the effects.
+
+        The tier depends on how fast the machine is, so headless runs (replays, benchmarks) switch it off, and
+        always play at full detail.
+    """
+    def __init__(self, clock, profiler=None) -> None:
+        self.enabled = QUALITY_GOVERNOR
+        self.clock = clock  # the GameClock, which knows how long wait() slept
+        self.profiler = profiler  # gets the current tier, for the overlay and telemetry
+        self.tier = 0  # index in QUALITY_TIERS, 0 is full detail
+        self.frame_times = deque(maxlen=QUALITY_WINDOW)  # ms of work in the last few frames
+        self.hold = 0  # frames to wait before the next change
+        self.frame_start = 0
+        self.waited_at_start = 0  # clock.frame_waited at start_frame()
+
+    @property
+    def settings(self) -> dict:
+        return QUALITY_TIERS[self.tier]
+
+    def set_tier(self, tier: int) -> None:
+        self.tier = min(max(tier, 0), len(QUALITY_TIERS) - 1)
+        self.frame_times.clear()
+        self.hold = QUALITY_HOLD
+        if self.profiler:
+            self.profiler.quality_tier = self.tier
+
+    def start_frame(self) -> None:
+        if self.enabled:
+            self.frame_start = time.perf_counter()
+            self.waited_at_start = self.clock.frame_waited
+
+    def end_frame(self) -> None:
+        if not self.enabled:
+            return
+        waited = self.clock.frame_waited - self.waited_at_start
+        self.frame_times.append(max((time.perf_counter() - self.frame_start) * 1000 - waited, 0))
+        if self.hold:
+            self.hold -= 1
+            return
+        if len(self.frame_times) < QUALITY_WINDOW:
+            return
+
+        average = sum(self.frame_times) / len(self.frame_times)
+        if average > QUALITY_FRAME_BUDGET and self.tier < len(QUALITY_TIERS) - 1:
+            self.set_tier(self.tier + 1)
+            logging.debug(f'Frames take {average:.1f} ms, quality down to tier {self.tier}')
+        elif average < QUALITY_FRAME_BUDGET * QUALITY_HEADROOM and self.tier > 0:
+            self.set_tier(self.tier - 1)
+            logging.debug(f'Frames take {average:.1f} ms, quality back up to tier {self.tier}')
+
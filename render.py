@@ -0,0 +1,68 @@
+"""
+RenderQueue (class)     : collects what the level draws in a frame, leaves out what is off screen, and blits the rest in one call
+"""
+
+import pygame as pg
+
+from game_data.settings import *
+
+
+class RenderQueue:
+    """ Level.run() used to call draw() on a dozen sprite groups, each blitting its sprites one at a time. Instead, the groups
+        (and the terrain grid) add what they want drawn here, back to front, and flush() hands it all to pygame in one fblits() (blits() on pygame)
+
+        Only things that are on screen are queued. Anything drawn straight to the screen (particles, weather, the player)
+        has to come after a flush(), or it ends up underneath.
+        update_area is the screen plus CULL_MARGIN, the sprites worth animating (see Level.run_group()).
+    """
+    def __init__(self, screen: pg.Surface) -> None:
+        self.screen = screen
+        self.screen_rect = screen.get_rect()
+        self.update_area = self.screen_rect.inflate(CULL_MARGIN * 2, CULL_MARGIN * 2)
+        self.blits = []  # (image, (x, y)), in drawing order
+        self.has_fblits = hasattr(screen, 'fblits')  # pygame-ce only, on pygame we use blits() (see requirements.txt)
+
+    def __len__(self) -> int:
+        return len(self.blits)
+
+    def add(self, image: pg.Surface, position: tuple) -> None:
+        """ Queues one image, without checking if it's on screen """
+        self.blits.append((image, position))
+
+    def extend(self, blits: list) -> None:
+        """ Queues (image, position) pairs that are already known to be on screen """
+        self.blits += blits
+
+    def add_group(self, group: pg.sprite.Group) -> int:
+        """ Queues the sprites of a group that are on screen, like group.draw() would draw them - returns how many """
+        screen_rect = self.screen_rect
+        # The image can be bigger than the rect (the rect doesn't always follow animation frames), so we cull on the image size
+        on_screen = [(sprite.image, sprite.rect.topleft) for sprite in group
+                     if screen_rect.colliderect(sprite.rect.topleft, sprite.image.get_size())]
+        self.blits += on_screen
+        return len(on_screen)
+
+    def add_trimmed(self, group: pg.sprite.Group) -> int:
+        """ Like add_group(), for sprites that draw a trimmed frame (see Animation.get_trimmed()) instead of their image
+            sprite.trimmed is (image, (x, y)), drawn at rect.topleft + (x, y) - right where it is in the full frame
+        """
+        screen_rect = self.screen_rect
+        on_screen = []
+        for sprite in group:
+            image, (x, y) = sprite.trimmed
+            position = (sprite.rect.x + x, sprite.rect.y + y)
+            if screen_rect.colliderect(position, image.get_size()):
+                on_screen.append((image, position))
+        self.blits += on_screen
+        return len(on_screen)
+
+    def flush(self) -> int:
+        """ Blits everything queued, returns the number of blits """
+        blits = len(self.blits)
+        if blits:
+            if self.has_fblits:
+                self.screen.fblits(self.blits)
+            else:
+                self.screen.blits(self.blits, doreturn=False)
+            self.blits = []
+        return blits
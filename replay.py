@@ -0,0 +1,166 @@
+"""
+InputRecorder (class)   : records the input and frame times of a level, together with the random seed it was started with
+InputReplay (class)     : reads a recording back and feeds it to the game, frame by frame
+
+A recording covers one level, from Game.create_level() onwards. Replaying it in headless.py (--replay)
+plays the level out exactly as it was recorded, frame for frame.
+
+File format: REPLAY_MAGIC, followed by a zlib compressed block with
+    - header length (uint32) + JSON header: level, seed, clock values and game state at the start
+    - one record per frame: input bit mask (uint8), frame time in ms (uint16), spawn queue length (uint8) + queue (uint8 each)
+"""
+
+import json
+import struct
+import zlib
+import logging
+
+
+REPLAY_MAGIC = b'PHFR'
+REPLAY_VERSION = 1
+
+INPUT_KEYS = ('left', 'right', 'up', 'down', 'attack', 'cast', 'quit')  # bit order of the input mask
+
+# GameState values which carry over from earlier levels, and which we need to be the same when replaying
+STATE_KEYS = ('player_health', 'player_health_max', 'player_score', 'player_stomp_counter', 'player_invincible',
+              'player_hit', 'player_dot', 'game_fade_ready', 'game_fade_counter', 'game_slowmo')
+
+HEADER = struct.Struct('<I')
+FRAME = struct.Struct('<BHB')
+MAX_FRAME_TIME = 2**16 - 1
+
+
+def _clock_state(clock) -> dict:
+    return {'ticks': clock.ticks, 'real_ticks': clock.real_ticks, 'time_scale': clock.time_scale}
+
+
+def _set_clock_state(clock, state: dict) -> None:
+    clock.ticks = state['ticks']
+    clock.real_ticks = state['real_ticks']
+    clock.time_scale = state['time_scale']
+    clock.pending_wait = 0
+
+
+class InputRecorder:
+    """ Records input, spawn requests and frame times, frame by frame
+        The main loop calls record_input() before and record_time() after each frame that runs the level
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.header = None
+        self.frames = []  # [input mask, frame time, spawn queue]
+
+    def start(self, gs) -> None:
+        """ Called when a level is created - any earlier recording is thrown away """
+        self.header = {
+            'version': REPLAY_VERSION,
+            'level': gs.level_current,
+            'seed': gs.random.seed_value,
+            'clock_created': _clock_state(gs.clock),  # the clock while the level is built (animations read it)
+            'clock_start': None,  # the clock when the first frame runs
+            'state': None,
+            'inventory': None,
+            'inputs': INPUT_KEYS,
+        }
+        self.frames = []
+        logging.debug(f'Recording level {gs.level_current} with seed {gs.random.seed_value} to {self.path}')
+
+    def record_input(self, gs) -> None:
+        if not self.header:
+            return
+        if not self.frames:
+            self.header['clock_start'] = _clock_state(gs.clock)
+            self.header['state'] = {key: getattr(gs, key) for key in STATE_KEYS}
+            self.header['inventory'] = [item[0] for item in gs.player_inventory]
+
+        mask = 0
+        for bit, key in enumerate(INPUT_KEYS):
+            if gs.user_input[key]:
+                mask |= 1 << bit
+        self.frames.append([mask, 0, bytes(gs.monster_spawn_queue)])
+
+    def record_time(self, clock) -> None:
+        if not self.frames:
+            return
+        frame_time = round(clock.frame_real_dt)
+        if frame_time > MAX_FRAME_TIME:
+            logging.warning(f'Frame time of {frame_time} ms too long for replay, recording {MAX_FRAME_TIME} ms')
+            frame_time = MAX_FRAME_TIME
+        self.frames[-1][1] = frame_time
+
+    def save(self) -> None:
+        if not self.frames:
+            logging.debug('Nothing recorded, no replay saved')
+            return
+        self.header['frames'] = len(self.frames)
+        header = json.dumps(self.header).encode()
+
+        data = bytearray(HEADER.pack(len(header)))
+        data += header
+        for mask, frame_time, queue in self.frames:
+            data += FRAME.pack(mask, frame_time, len(queue))
+            data += queue
+
+        with open(self.path, 'wb') as replay_file:
+            replay_file.write(REPLAY_MAGIC + zlib.compress(bytes(data), 9))
+        logging.debug(f'Saved replay of {len(self.frames)} frames to {self.path}')
+
+
+class InputReplay:
+    """ Plays back a recording made by InputRecorder """
+    def __init__(self, header: dict, frames: list) -> None:
+        self.header = header
+        self.frames = frames  # (input dict, frame time, spawn queue)
+        self.level = header['level']
+        self.seed = header['seed']
+
+    @classmethod
+    def load(cls, path: str) -> 'InputReplay':
+        with open(path, 'rb') as replay_file:
+            raw = replay_file.read()
+        if not raw.startswith(REPLAY_MAGIC):
+            raise ValueError(f'{path} is not a Phflorg replay')
+        data = zlib.decompress(raw[len(REPLAY_MAGIC):])
+
+        (header_length,) = HEADER.unpack_from(data, 0)
+        offset = HEADER.size
+        header = json.loads(data[offset:offset + header_length])
+        offset += header_length
+        if header['version'] != REPLAY_VERSION:
+            raise ValueError(f'{path} is replay version {header["version"]}, we only read version {REPLAY_VERSION}')
+
+        frames = []
+        for _ in range(header['frames']):
+            mask, frame_time, queue_length = FRAME.unpack_from(data, offset)
+            offset += FRAME.size
+            queue = list(data[offset:offset + queue_length])
+            offset += queue_length
+            inputs = {key: bool(mask & 1 << bit) for bit, key in enumerate(header['inputs'])}
+            frames.append((inputs, frame_time, queue))
+
+        return cls(header, frames)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def before_level(self, gs) -> None:
+        """ Called before the level is created """
+        _set_clock_state(gs.clock, self.header['clock_created'])
+
+    def after_level(self, gs, level) -> None:
+        """ Called after the level is created, before the first frame """
+        _set_clock_state(gs.clock, self.header['clock_start'])
+        for key, value in self.header['state'].items():
+            setattr(gs, key, value)
+        gs.player_inventory = [(item, level.key_img) for item in self.header['inventory']]  # only keys so far
+
+    def apply(self, frame: int, gs) -> None:
+        """ Sets the input for the frame, before it runs """
+        inputs, _, queue = self.frames[frame]
+        gs.user_input.update(inputs)
+        gs.monster_spawn_queue[:] = queue
+
+    def advance_clock(self, frame: int, clock) -> None:
+        """ Moves the clock on after the frame has run, exactly like the recorded frame did """
+        clock.pending_wait = 0  # any wait() is already part of the recorded frame time
+        clock.tick(self.frames[frame][1])
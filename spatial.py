@@ -0,0 +1,58 @@
+"""
+SpatialGrid (class)     : uniform grid over world coordinates, for finding what is near a given area without checking everything
+"""
+
+import pygame as pg
+
+
+class SpatialGrid:
+    """ Buckets items by the grid cells their rect overlaps, so area queries only look at nearby items
+
+        Rects are in world coordinates (they don't change when the screen scrolls), so only items that
+        actually move need to be moved in the grid. Items can be anything hashable.
+    """
+    def __init__(self, cell_size: int) -> None:
+        self.cell_size = cell_size
+        self.cells = {}  # (column, row): set of items
+        self.item_cells = {}  # item: tuple of the (column, row) cells it is in
+
+    def __len__(self) -> int:
+        return len(self.item_cells)
+
+    def __contains__(self, item) -> bool:
+        return item in self.item_cells
+
+    def _cells_for(self, rect: pg.Rect) -> tuple:
+        first_col, first_row = rect.left // self.cell_size, rect.top // self.cell_size
+        last_col, last_row = (rect.right - 1) // self.cell_size, (rect.bottom - 1) // self.cell_size
+        return tuple((col, row) for col in range(first_col, max(first_col, last_col) + 1)
+                                for row in range(first_row, max(first_row, last_row) + 1))
+
+    def insert(self, item, rect: pg.Rect) -> None:
+        cells = self._cells_for(rect)
+        self.item_cells[item] = cells
+        for cell in cells:
+            self.cells.setdefault(cell, set()).add(item)
+
+    def move(self, item, rect: pg.Rect) -> None:
+        """ Updates the cells of an item that has moved - cheap when it stays in the same cells """
+        cells = self._cells_for(rect)
+        if cells != self.item_cells.get(item):
+            self.remove(item)
+            self.insert(item, rect)
+
+    def remove(self, item) -> None:
+        for cell in self.item_cells.pop(item, ()):
+            bucket = self.cells[cell]
+            bucket.discard(item)
+            if not bucket:
+                del self.cells[cell]
+
+    def query(self, rect: pg.Rect) -> set:
+        """ All items in the cells rect overlaps - a broad phase, so items may be near rect without touching it """
+        found = set()
+        for cell in self._cells_for(rect):
+            bucket = self.cells.get(cell)
+            if bucket:
+                found.update(bucket)
+        return found
@@ -0,0 +1,137 @@
+"""
+TelemetryRecorder (class)   : records frame times, stage timings and sprite/particle/sound counts, one CSV row per frame
+load_trace (function)       : reads a recorded trace back
+compare_traces (function)   : compares the timings of two traces and flags p95/p99 regressions
+
+Record with: python phflorg.py --telemetry session.csv.gz   (plain .csv works too, .gz keeps it small)
+Compare with: python telemetry.py before.csv.gz after.csv.gz [--threshold 10]
+The compare tool exits with 1 when it finds a regression, so it can be used in scripts.
+"""
+
+import csv
+import gzip
+import sys
+import logging
+import argparse
+
+import pygame as pg
+
+from profiler import percentiles
+
+
+# Top-level stages of Level.run()/Game.run() (see FrameProfiler), and the sprite groups counted in Level.run()
+TELEMETRY_STAGES = ('background', 'terrain', 'monsters', 'player', 'effects', 'render', 'collision', 'hud')
+TELEMETRY_GROUPS = ('terrain', 'decorations', 'hazards', 'pickups', 'drops', 'projectiles', 'spells', 'triggered objects',
+                    'monsters', 'stomp shadows', 'stomp effects', 'dust', 'info pop-ups', 'environment')
+
+TIMING_COLUMNS = ('frame_ms', 'work_ms') + tuple(f'{stage}_ms' for stage in TELEMETRY_STAGES)
+COLUMNS = ('frame', 'level', 'ticks') + TIMING_COLUMNS + tuple(TELEMETRY_GROUPS) + ('particles', 'voices', 'quality')
+
+REGRESSION_THRESHOLD = 10  # % slower before we call it a regression
+REGRESSION_MIN_MS = 0.1  # ignore differences smaller than this, they're noise
+
+
+def _open(path: str, mode: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', newline='')
+    return open(path, mode, newline='')
+
+
+def busy_voices() -> int:
+    """ Number of mixer channels playing right now """
+    if not pg.mixer.get_init():
+        return 0
+    return sum(pg.mixer.Channel(channel).get_busy() for channel in range(pg.mixer.get_num_channels()))
+
+
+class TelemetryRecorder:
+    """ Writes one row per frame: the real frame time, the time spent in Game.run() ('work') and in each of its stages,
+        the number of sprites in each of the level's sprite groups, active particles, mixer voices in use and the quality tier
+
+        Needs the frame profiler, which it keeps enabled until close().
+    """
+    def __init__(self, path: str, profiler) -> None:
+        self.path = path
+        self.profiler = profiler
+        self.profiler.enable('telemetry')
+        self.file = _open(path, 'w')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(COLUMNS)
+        self.frames = 0
+        self.last_stages = None  # the profiler's last frame when we last recorded
+        logging.debug(f'Recording telemetry to {path}')
+
+    def record(self, gs) -> None:
+        """ Called once per frame that ran the level, after the clock has been updated """
+        stages = self.profiler.last_frame
+        counts = self.profiler.last_counts
+        row = [self.frames, gs.level_current, gs.clock.get_ticks(), f'{gs.clock.frame_real_dt:.2f}']
+        if stages is self.last_stages:  # the level didn't run this frame (fading), so the timings stay empty
+            row += [''] * (len(TELEMETRY_STAGES) + 1)
+        else:
+            row.append(f'{stages.get("frame", 0):.2f}')
+            row += [f'{stages.get(stage, 0):.2f}' for stage in TELEMETRY_STAGES]
+        self.last_stages = stages
+        row += [counts.get(group, (0, 0))[0] for group in TELEMETRY_GROUPS]
+        row += [counts.get('particles', (0, 0))[0], busy_voices(), self.profiler.quality_tier]
+        self.writer.writerow(row)
+        self.frames += 1
+
+    def close(self) -> None:
+        if self.file:
+            self.file.close()
+            self.file = None
+            self.profiler.disable('telemetry')
+            logging.debug(f'Saved telemetry of {self.frames} frames to {self.path}')
+
+
+def load_trace(path: str) -> dict:
+    """ Returns {column: [values]} with all values as floats - empty values (frames without timings) are left out """
+    with _open(path, 'r') as trace_file:
+        reader = csv.DictReader(trace_file)
+        trace = {column: [] for column in reader.fieldnames}
+        for row in reader:
+            for column, value in row.items():
+                if value:
+                    trace[column].append(float(value))
+    return trace
+
+
+def compare_traces(before: dict, after: dict, threshold: float=REGRESSION_THRESHOLD) -> list:
+    """ Compares p50/p95/p99 of every timing column - returns a list of
+        (column, percentile, before ms, after ms, change in %, regression) for the columns both traces have
+    """
+    results = []
+    for column in TIMING_COLUMNS:
+        if not before.get(column) or not after.get(column):
+            continue
+        old = percentiles(before[column])
+        new = percentiles(after[column])
+        for percentile in ('p50', 'p95', 'p99'):
+            change = (new[percentile] - old[percentile]) / old[percentile] * 100 if old[percentile] else 0
+            regression = (percentile != 'p50' and change > threshold
+                          and new[percentile] - old[percentile] > REGRESSION_MIN_MS)  # p50 is informational only
+            results.append((column, percentile, old[percentile], new[percentile], change, regression))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare two Phflorg telemetry traces')
+    parser.add_argument('before', help='trace recorded before the change')
+    parser.add_argument('after', help='trace recorded after the change')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD, help='%% slower p95/p99 that counts as a regression')
+    args = parser.parse_args()
+
+    before = load_trace(args.before)
+    after = load_trace(args.after)
+    results = compare_traces(before, after, args.threshold)
+
+    print(f'{len(before["frame"])} frames before, {len(after["frame"])} frames after')
+    print(f'{"column":<14}{"":>5}{"before":>10}{"after":>10}{"change":>10}')
+    for column, percentile, old, new, change, regression in results:
+        print(f'{column:<14}{percentile:>5}{old:>10.2f}{new:>10.2f}{change:>9.1f}%{"  REGRESSION" if regression else ""}')
+
+    regressions = [result for result in results if result[5]]
+    if regressions:
+        print(f'{len(regressions)} regression(s) over {args.threshold}%')
+    sys.exit(1 if regressions else 0)
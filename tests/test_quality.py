@@ -0,0 +1,35 @@
+"""
+Tests for QualityGovernor (quality.py), run headlessly on the game's own levels
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def test_wait_does_not_cost_a_tier(monkeypatch):
+    """ A frame that freezes the game with GameClock.wait() (a key pickup, the player dying) isn't counted as work """
+    monkeypatch.chdir(ROOT)  # the game loads its assets from paths relative to the repository
+    from game_data.settings import FIRST_LEVEL, QUALITY_WINDOW
+    from headless import HeadlessGame
+
+    headless = HeadlessGame(FIRST_LEVEL, seed=1)
+    gs = headless.gs
+    gs.quality.enabled = True
+    gs.clock.real_time = True  # wait() really sleeps, like it does in the game
+    headless.run(QUALITY_WINDOW)
+    tier = gs.quality.tier
+
+    level_run = headless.level.run
+    def run_and_wait() -> None:
+        level_run()
+        gs.clock.wait(250)
+    monkeypatch.setattr(headless.level, 'run', run_and_wait)
+    headless.step()
+    monkeypatch.setattr(headless.level, 'run', level_run)
+    assert gs.quality.frame_times and gs.quality.frame_times[-1] < 250
+
+    headless.run(QUALITY_WINDOW)
+    assert gs.quality.tier == tier
@@ -0,0 +1,145 @@
+"""
+Tile (class)        : a static terrain tile found by a TileGrid query, with what the collision code needs from a terrain sprite
+TileGrid (class)    : a level's terrain as flat typed arrays (tile numbers and flags), with the moving platforms as sprites on top
+"""
+
+import logging
+from array import array
+
+import pygame as pg
+
+from game_data.settings import *
+from game_tiles import MovingGameTile
+from game_functions import optimize_surface
+
+
+class Tile:
+    """ One static terrain tile - made when a query finds it, so the collision code can treat it like a terrain sprite """
+    __slots__ = ('rect', 'solid', 'slope', 'index')
+    moving = False  # moving platforms are MovingGameTile sprites
+
+    def __init__(self, rect: pg.Rect, solid: bool, slope: tuple, index: int) -> None:
+        self.rect = rect  # screen coordinates, like a sprite's rect
+        self.solid = solid  # some, like water, allows you to fall
+        self.slope = slope  # for sloping tiles, the height of the ground above the bottom of the tile for each pixel column, None if flat
+        self.index = index  # position in the layout (row * columns + column), the order the terrain sprites used to be in
+
+    def ground_height(self, x) -> int:
+        # Height of the ground above the bottom of a sloping tile, x pixels from its left edge (the profile starts SLOPE_MARGIN before it)
+        return self.slope[min(max(int(x) + SLOPE_MARGIN, 0), len(self.slope) - 1)]
+
+
+class TileGrid:
+    """ The terrain of a level, kept as the grid it is instead of a sprite per tile
+
+        The tile number of every cell is in one flat array (-1 for empty), and whether it is solid in another, both indexed
+        by row * columns + column. Drawing only looks at the cells on screen, and the collision queries (near(), collide())
+        only at the cells under the rect they're given, instead of going through thousands of sprites every time.
+        Cells are in world coordinates, and we keep track of the scroll (like TriggerZones): screen = world + scroll.
+
+        Moving platforms move on their own, so they stay sprites (self.moving), and the queries find them too.
+        Tiles are TILE_SIZE_SCREEN apart, but scaled up 2x they are a bit bigger, so neighbours overlap by a few pixels -
+        everything is drawn and found in layout order, like the terrain sprite group did.
+    """
+    def __init__(self, layout: list, tiles: list, solid_tiles: list, moving_tiles: list, slope_profiles: dict) -> None:
+        self.columns = max(len(row) for row in layout)
+        self.rows = len(layout)
+        self.cell_size = TILE_SIZE_SCREEN
+        self.tile_size = TILE_SIZE * 2  # terrain tiles are scaled up 2x
+        self.scroll_x = 0  # total scroll so far
+        self.scroll_y = 0
+
+        self.tiles = array('h', [-1]) * (self.columns * self.rows)  # tile number of every cell, -1 for empty
+        self.solid = array('b', [0]) * (self.columns * self.rows)
+        self.images = {}  # tile number: scaled image, shared by all cells with that tile
+        self.slope_profiles = slope_profiles  # tile number: height profile, for sloping tiles only
+        self.moving = []  # (index, MovingGameTile), in layout order
+        self.count = 0  # static tiles
+
+        for row_index, row in enumerate(layout):
+            for col_index, val in enumerate(row):
+                if val == '-1':
+                    continue
+                tile_number = int(val)
+                tile_surface = tiles[tile_number]
+                (x_size, y_size) = tile_surface.get_size()
+                if not x_size == y_size == TILE_SIZE:
+                    logging.debug(f'Terrain tiles are of size {x_size}x{y_size}, but we have TILE_SIZE {TILE_SIZE} in settings')
+
+                index = row_index * self.columns + col_index
+                x = col_index * self.cell_size
+                y = row_index * self.cell_size
+                if tile_number in moving_tiles:  # TODO: for now only accepts single tiles
+                    distance = 100
+                    platform = MovingGameTile(x_size * 2, y_size * 2, x, y, 3, distance, tile_surface)  # Moving platform
+                    platform.solid = tile_number in solid_tiles
+                    self.moving.append((index, platform))
+                    continue
+
+                if tile_number not in self.images:
+                    self.images[tile_number] = optimize_surface(pg.transform.scale(tile_surface, (self.tile_size, self.tile_size)))
+                self.tiles[index] = tile_number
+                self.solid[index] = tile_number in solid_tiles  # not solid is water mostly
+                self.count += 1
+
+    def __len__(self) -> int:
+        return self.count + len(self.moving)
+
+    def _cells(self, left: int, top: int, right: int, bottom: int) -> tuple:
+        """ Column and row ranges of the tiles that can overlap an area (world coordinates) """
+        cell, size = self.cell_size, self.tile_size
+        columns = range(max((left - size) // cell + 1, 0), min((right - 1) // cell, self.columns - 1) + 1)
+        rows = range(max((top - size) // cell + 1, 0), min((bottom - 1) // cell, self.rows - 1) + 1)
+        return columns, rows
+
+    def update(self, h_scroll, v_scroll) -> None:
+        self.scroll_x += h_scroll
+        self.scroll_y += v_scroll
+        for _, platform in self.moving:
+            platform.update(h_scroll, v_scroll)
+
+    def draw(self, render_queue) -> int:
+        """ Queues the tiles on screen for drawing (see RenderQueue), returns how many """
+        screen_rect = render_queue.screen_rect
+        columns, rows = self._cells(screen_rect.left - self.scroll_x, screen_rect.top - self.scroll_y,
+                                    screen_rect.right - self.scroll_x, screen_rect.bottom - self.scroll_y)
+        blits = []  # (index, image, position)
+        for row in rows:
+            y = row * self.cell_size + self.scroll_y
+            row_start = row * self.columns
+            for col in columns:
+                tile_number = self.tiles[row_start + col]
+                if tile_number >= 0:
+                    blits.append((row_start + col, self.images[tile_number], (col * self.cell_size + self.scroll_x, y)))
+
+        platforms = [(index, platform.image, platform.rect.topleft) for index, platform in self.moving if platform.rect.colliderect(screen_rect)]
+        if platforms:  # drawn in between the tiles, in layout order
+            blits = sorted(blits + platforms, key=lambda blit: blit[0])
+
+        render_queue.extend([(image, position) for _, image, position in blits])
+        return len(blits)
+
+    def near(self, rect: pg.Rect) -> list:
+        """ The tiles and moving platforms touching rect (screen coordinates), in layout order """
+        columns, rows = self._cells(rect.left - self.scroll_x, rect.top - self.scroll_y,
+                                    rect.right - self.scroll_x, rect.bottom - self.scroll_y)
+        found = []
+        for row in rows:
+            y = row * self.cell_size + self.scroll_y
+            row_start = row * self.columns
+            for col in columns:
+                tile_number = self.tiles[row_start + col]
+                if tile_number >= 0:
+                    tile_rect = pg.Rect(col * self.cell_size + self.scroll_x, y, self.tile_size, self.tile_size)
+                    if tile_rect.colliderect(rect):
+                        found.append(Tile(tile_rect, self.solid[row_start + col] == 1, self.slope_profiles.get(tile_number), row_start + col))
+
+        platforms = [(index, platform) for index, platform in self.moving if platform.rect.colliderect(rect)]
+        if platforms:
+            found = [tile for _, tile in sorted([(tile.index, tile) for tile in found] + platforms, key=lambda hit: hit[0])]
+        return found
+
+    def collide(self, rect: pg.Rect):
+        """ The first tile or moving platform touching rect, None if there is none (like pg.sprite.spritecollideany()) """
+        found = self.near(rect)
+        return found[0] if found else None